@@ -0,0 +1,41 @@
+"""Add the chat history keyset and generation status indexes
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 00:00:00
+
+Base.metadata.create_all only creates indexes along with new tables, so
+databases created before these indexes existed need this migration.
+Tables that do not exist yet are skipped; create_all builds them with
+their indexes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_chat_messages_created_at_id", "chat_messages", ["created_at", "id"]),
+    ("ix_generations_status_created_at", "generations", ["status", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, table, columns in INDEXES:
+        if table in tables:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, table, _ in INDEXES:
+        if table in tables:
+            op.drop_index(name, table_name=table, if_exists=True)
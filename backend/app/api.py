@@ -1,18 +1,30 @@
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-import json
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import uuid
+import hashlib
 import asyncio
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
+from contextlib import asynccontextmanager, suppress
+from functools import lru_cache
 
-from .gemini_client import gemini_client
+import httpx
+import jsonpatch
+import orjson
+from jsonpointer import JsonPointerException
+
+from . import crud, redis_client
+from .cerebras_client import aclose_http_client, set_shared_http_client
+from .database import Base, async_session, engine
+from .gemini_client import DEFAULT_QUALITY_SCORES, get_gemini_client
+from .tasks import run_crew_generation
 from .models import *
+from .patching import patch_manifest
 from .services import UIGenerationService, ChatService, PreviewService
 from .websocket_manager import WebSocketManager
 
@@ -20,13 +32,50 @@ from .websocket_manager import WebSocketManager
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP/2 client for outbound model API calls for the app's lifetime
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(60, connect=5),
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_keepalive_connections=50)
+        )
+    )
+    set_shared_http_client(app.state.http)
+    # Every model shares database.Base, so one pass creates all tables and indexes
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    redis = await redis_client.init_redis()
+    # Forward updates published by background crew workers to this process's WebSocket clients
+    worker_relay = asyncio.create_task(relay_worker_broadcasts()) if redis is not None else None
+    chat_writer = asyncio.create_task(write_chat_messages())
+    
+    yield
+    
+    if worker_relay is not None:
+        worker_relay.cancel()
+    chat_writer.cancel()
+    with suppress(asyncio.CancelledError):
+        await chat_writer
+    await flush_chat_messages()
+    await ws_manager.stop()
+    await redis_client.close_redis()
+    set_shared_http_client(None)
+    await aclose_http_client()
+    await app.state.http.aclose()
+    await engine.dispose()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Magic UI Elite API",
     description="Elite AI-powered UI generation platform with real-time neural network visualization",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -51,6 +100,7 @@ class GenerationRequest(BaseModel):
     style_preferences: Optional[List[str]] = []
     target_platforms: Optional[List[str]] = ["web"]
     accessibility_level: Optional[str] = "AA"
+    no_cache: Optional[bool] = False  # Skip the response cache for sensitive prompts
 
 class ChatMessage(BaseModel):
     role: str
@@ -69,84 +119,208 @@ class ExportRequest(BaseModel):
     include_assets: bool = True
     optimize: bool = True
 
+class CrewGenerationRequest(BaseModel):
+    design_intent: Dict[str, Any]
+    project_id: Optional[str] = None
+
+class BatchItem(BaseModel):
+    id: str
+    url: str
+    method: str = "GET"
+    body: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(max_length=64)
+
 # Health check
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
         "version": "1.0.0"
     }
 
+# Manifest storage
+MANIFEST_PATH = "generated/preview-manifest.json"
+
+# Latest parsed manifest keyed by its Redis payload or file mtime; only one manifest is ever cached
+_manifest_cache: Optional[Tuple[Any, Dict[str, Any]]] = None
+
+def invalidate_manifest_cache():
+    global _manifest_cache
+    _manifest_cache = None
+
+async def load_manifest() -> Optional[Dict[str, Any]]:
+    """Load the saved manifest, reusing the parsed copy while the file is unchanged.
+    
+    The returned dict is shared; callers that modify it must copy it first.
+    """
+    global _manifest_cache
+    # Redis holds the copy shared by all workers; the file is the fallback
+    raw = await redis_client.get_manifest()
+    if raw is not None:
+        if _manifest_cache and _manifest_cache[0] == raw:
+            return _manifest_cache[1]
+        manifest = orjson.loads(raw)
+        _manifest_cache = (raw, manifest)
+        return manifest
+    
+    try:
+        st = await asyncio.to_thread(os.stat, MANIFEST_PATH)
+    except FileNotFoundError:
+        _manifest_cache = None
+        return None
+    
+    if _manifest_cache and _manifest_cache[0] == st.st_mtime_ns:
+        return _manifest_cache[1]
+    
+    def _read():
+        with open(MANIFEST_PATH, "rb") as f:
+            return f.read()
+    
+    manifest = orjson.loads(await asyncio.to_thread(_read))
+    _manifest_cache = (st.st_mtime_ns, manifest)
+    return manifest
+
+def _write_manifest(manifest: Dict[str, Any]):
+    """Write the manifest atomically so concurrent readers never see a partial file"""
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    tmp_path = f"{MANIFEST_PATH}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, MANIFEST_PATH)
+
+async def save_manifest(manifest: Dict[str, Any]):
+    await asyncio.to_thread(_write_manifest, manifest)
+    await redis_client.set_manifest(manifest)
+    invalidate_manifest_cache()
+
 # Generation endpoints
+GENERATION_TIMEOUT_SECONDS = 60
+STYLE_NAMES = ["retro-futurism-mesh", "glass-aurora", "brutalist-editorial", "minimal-monochrome"]
+
+# Caps concurrent Gemini calls across all in-flight generations
+gemini_semaphore = asyncio.Semaphore(8)
+
+async def _limited(coro):
+    async with gemini_semaphore:
+        return await coro
+
+@lru_cache(maxsize=64)
+def _display_name(style_name: str) -> str:
+    return style_name.replace("-", " ").title()
+
+async def build_variant(variant_id: str, style_name: str, ui_schema: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+    """Generate style, code, preview and quality scores for a single variant"""
+    style_spec = await _limited(get_gemini_client().generate_style_spec(ui_schema, style_name, use_cache=use_cache))
+    
+    async def forward_file(path: str, content: str):
+        ws_manager.publish({
+            "type": "code_file",
+            "data": {"variant_id": variant_id, "path": path, "content": content}
+        })
+    
+    async def code_and_preview() -> str:
+        code_files = await _limited(get_gemini_client().generate_code(
+            ui_schema, style_spec, variant_id, on_file=forward_file, use_cache=use_cache
+        ))
+        return await preview_service.create_preview(variant_id, code_files, style_spec)
+    
+    # Code and quality analysis only depend on the schema and style spec; a failed
+    # quality analysis must not abort code generation
+    preview_path, quality_scores = await asyncio.gather(
+        code_and_preview(),
+        _limited(get_gemini_client().analyze_design_quality(ui_schema, style_spec)),
+        return_exceptions=True
+    )
+    if isinstance(preview_path, BaseException):
+        raise preview_path
+    if isinstance(quality_scores, BaseException):
+        logger.warning(f"Quality analysis failed for {variant_id}: {quality_scores}")
+        quality_scores = dict(DEFAULT_QUALITY_SCORES)
+    
+    return {
+        "id": variant_id,
+        "name": _display_name(style_name),
+        "style": style_name,
+        "style_spec": style_spec,
+        "build": f"./out/{variant_id}",
+        "preview": preview_path,
+        "novelty": style_spec.get("novelty_score", 0.8),
+        "metadata": {
+            "width": 1200,
+            "height": 800,
+            "responsive": True,
+            "quality_scores": quality_scores
+        }
+    }
+
+def build_manifest(brief: str, variants: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "brief": brief,
+        "ui_schema_path": "UI_SCHEMA.json",
+        "variants": variants,
+        "preview_manifest": "preview-manifest.json",
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "version": "1.0.0"
+    }
+
+async def run_generation(brief: str, mood: Optional[str], use_cache: bool) -> Dict[str, Any]:
+    """Run the full schema and variant pipeline, then save and broadcast the manifest"""
+    async with asyncio.timeout(GENERATION_TIMEOUT_SECONDS):
+        # Generate UI schema
+        ui_schema = await get_gemini_client().generate_ui_schema(brief, mood, use_cache=use_cache)
+        
+        # Build all style variants concurrently
+        async with asyncio.TaskGroup() as tg:
+            variant_tasks = [
+                tg.create_task(build_variant(f"v{i+1}", style_name, ui_schema, use_cache))
+                for i, style_name in enumerate(STYLE_NAMES)
+            ]
+    variants = [task.result() for task in variant_tasks]
+    
+    # Create and save manifest
+    manifest = build_manifest(brief, variants)
+    await save_manifest(manifest)
+    
+    # Broadcast update via WebSocket
+    ws_manager.publish({
+        "type": "generation_complete",
+        "data": manifest
+    })
+    return manifest
+
+# Identical concurrent generations share one pipeline run, keyed by brief and mood
+_inflight_generations: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+
+def _generation_key(brief: str, mood: Optional[str]) -> str:
+    return hashlib.blake2b(f"{brief}\0{mood}".encode(), digest_size=16).hexdigest()
+
+async def generate_once(brief: str, mood: Optional[str]) -> Dict[str, Any]:
+    """Join an identical in-flight generation, or start one"""
+    key = _generation_key(brief, mood)
+    task = _inflight_generations.get(key)
+    if task is None:
+        task = asyncio.create_task(run_generation(brief, mood, use_cache=True))
+        _inflight_generations[key] = task
+        task.add_done_callback(lambda _: _inflight_generations.pop(key, None))
+    else:
+        logger.info("Joining in-flight generation for identical brief")
+    
+    # Shielded so one caller disconnecting doesn't cancel the run for the others
+    return await asyncio.shield(task)
+
 @app.post("/api/generate")
 async def generate_ui(request: GenerationRequest, background_tasks: BackgroundTasks):
     """Generate UI variants from user brief"""
     try:
         logger.info(f"Generating UI for brief: {request.brief[:50]}...")
         
-        # Generate UI schema
-        ui_schema = await gemini_client.generate_ui_schema(request.brief, request.mood)
-        
-        # Generate style variants
-        style_variants = []
-        style_names = ["retro-futurism-mesh", "glass-aurora", "brutalist-editorial", "minimal-monochrome"]
-        
-        for i, style_name in enumerate(style_names):
-            style_spec = await gemini_client.generate_style_spec(ui_schema, style_name)
-            style_variants.append(style_spec)
-        
-        # Generate code for each variant
-        variants = []
-        for i, (style_spec, style_name) in enumerate(zip(style_variants, style_names)):
-            variant_id = f"v{i+1}"
-            
-            # Generate code
-            code_files = await gemini_client.generate_code(ui_schema, style_spec, variant_id)
-            
-            # Create preview
-            preview_path = await preview_service.create_preview(variant_id, code_files, style_spec)
-            
-            # Analyze quality
-            quality_scores = await gemini_client.analyze_design_quality(ui_schema, style_spec)
-            
-            variant = {
-                "id": variant_id,
-                "name": style_name.replace("-", " ").title(),
-                "style": style_name,
-                "style_spec": style_spec,
-                "build": f"./out/{variant_id}",
-                "preview": preview_path,
-                "novelty": style_spec.get("novelty_score", 0.8),
-                "metadata": {
-                    "width": 1200,
-                    "height": 800,
-                    "responsive": True,
-                    "quality_scores": quality_scores
-                }
-            }
-            variants.append(variant)
-        
-        # Create manifest
-        manifest = {
-            "brief": request.brief,
-            "ui_schema_path": "UI_SCHEMA.json",
-            "variants": variants,
-            "preview_manifest": "preview-manifest.json",
-            "generated_at": datetime.now().isoformat(),
-            "version": "1.0.0"
-        }
-        
-        # Save manifest
-        os.makedirs("generated", exist_ok=True)
-        with open("generated/preview-manifest.json", "w") as f:
-            json.dump(manifest, f, indent=2)
-        
-        # Broadcast update via WebSocket
-        await ws_manager.broadcast({
-            "type": "generation_complete",
-            "data": manifest
-        })
+        if request.no_cache:
+            manifest = await run_generation(request.brief, request.mood, use_cache=False)
+        else:
+            manifest = await generate_once(request.brief, request.mood)
         
         return {
             "success": True,
@@ -154,17 +328,66 @@ async def generate_ui(request: GenerationRequest, background_tasks: BackgroundTa
             "processing_time": 0  # Will be calculated in real implementation
         }
         
+    except TimeoutError:
+        logger.error(f"UI generation timed out after {GENERATION_TIMEOUT_SECONDS}s")
+        raise HTTPException(status_code=504, detail="UI generation timed out")
     except Exception as e:
         logger.error(f"Error generating UI: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+@app.post("/api/generate/stream")
+async def generate_ui_stream(request: GenerationRequest):
+    """Generate UI variants, streaming each one as a server-sent event as soon as it is ready"""
+    use_cache = not request.no_cache
+    
+    async def events():
+        variant_tasks = []
+        # One budget for the whole generation, applied only around awaits: a timeout
+        # scope must not stay open across a yield, where the generator is suspended
+        deadline = asyncio.get_running_loop().time() + GENERATION_TIMEOUT_SECONDS
+        try:
+            async with asyncio.timeout_at(deadline):
+                ui_schema = await get_gemini_client().generate_ui_schema(request.brief, request.mood, use_cache=use_cache)
+            
+            variant_tasks = [
+                asyncio.create_task(build_variant(f"v{i+1}", style_name, ui_schema, use_cache))
+                for i, style_name in enumerate(STYLE_NAMES)
+            ]
+            variants = []
+            for next_variant in asyncio.as_completed(variant_tasks):
+                async with asyncio.timeout_at(deadline):
+                    variant = await next_variant
+                variants.append(variant)
+                ws_manager.publish({"type": "variant_ready", "data": variant})
+                yield _sse("variant", variant)
+            
+            variants.sort(key=lambda v: v["id"])
+            manifest = build_manifest(request.brief, variants)
+            await save_manifest(manifest)
+            ws_manager.publish({"type": "generation_complete", "data": manifest})
+            yield _sse("manifest", manifest)
+        
+        except Exception as e:
+            logger.error(f"Error streaming UI generation: {e}")
+            detail = "UI generation timed out" if isinstance(e, TimeoutError) else str(e)
+            yield _sse("error", {"detail": detail})
+        finally:
+            for task in variant_tasks:
+                task.cancel()
+    
+    logger.info(f"Streaming UI generation for brief: {request.brief[:50]}...")
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.get("/api/preview/manifest")
 async def get_preview_manifest():
     """Get current preview manifest"""
     try:
-        if os.path.exists("generated/preview-manifest.json"):
-            with open("generated/preview-manifest.json", "r") as f:
-                return json.load(f)
+        manifest = await load_manifest()
+        if manifest is not None:
+            return manifest
         else:
             # Return empty manifest if none exists
             return {
@@ -172,7 +395,7 @@ async def get_preview_manifest():
                 "ui_schema_path": "",
                 "variants": [],
                 "preview_manifest": "",
-                "generated_at": datetime.now().isoformat(),
+                "generated_at": datetime.now(timezone.utc).isoformat(),
                 "version": "1.0.0"
             }
     except Exception as e:
@@ -180,8 +403,62 @@ async def get_preview_manifest():
         raise HTTPException(status_code=500, detail=str(e))
 
 # Chat endpoints
+CHAT_WRITE_WINDOW_SECONDS = 0.05
+CHAT_WRITE_BATCH_SIZE = 128
+
+# Messages waiting to be written; bursts are coalesced into one INSERT per window
+_chat_rows: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+async def _insert_chat_rows(rows: List[Dict[str, Any]]):
+    try:
+        async with async_session() as db:
+            await crud.create_chat_messages(db, rows)
+    except Exception as e:
+        # Rows are dropped here, so leave the full traceback for whoever has to find out why
+        logger.exception(f"Error writing {len(rows)} chat messages: {e}")
+
+async def write_chat_messages():
+    """Drain queued chat messages into the database in batches until cancelled"""
+    loop = asyncio.get_running_loop()
+    while True:
+        rows = []
+        try:
+            rows.append(await _chat_rows.get())
+            deadline = loop.time() + CHAT_WRITE_WINDOW_SECONDS
+            while len(rows) < CHAT_WRITE_BATCH_SIZE:
+                try:
+                    rows.append(await asyncio.wait_for(_chat_rows.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            await _insert_chat_rows(rows)
+        except asyncio.CancelledError:
+            # Shutdown: rows already taken off the queue would be lost otherwise; if the cancel
+            # landed after the commit, the repeat fails on the primary key and is only logged
+            if rows:
+                await _insert_chat_rows(rows)
+            raise
+
+async def flush_chat_messages():
+    """Write whatever is still queued, for shutdown"""
+    rows = []
+    while not _chat_rows.empty():
+        rows.append(_chat_rows.get_nowait())
+    if rows:
+        await _insert_chat_rows(rows)
+
+async def persist_chat_exchange(user_message: Dict[str, Any], response_message: Dict[str, Any]):
+    """Record a chat exchange in history and the database after the response is sent"""
+    try:
+        await chat_service.save_message(user_message)
+        await chat_service.save_message(response_message)
+        _chat_rows.put_nowait(user_message)
+        _chat_rows.put_nowait(response_message)
+        await redis_client.push_chat_messages([user_message, response_message])
+    except Exception as e:
+        logger.exception(f"Error persisting chat messages: {e}")
+
 @app.post("/api/chat")
-async def send_chat_message(message: ChatMessage):
+async def send_chat_message(message: ChatMessage, background_tasks: BackgroundTasks):
     """Send chat message and get AI response"""
     try:
         # Generate AI response
@@ -190,24 +467,28 @@ async def send_chat_message(message: ChatMessage):
             "selected_agent": message.agent
         }
         
-        ai_response = await gemini_client.generate_chat_response(message.text, context)
+        ai_response = await get_gemini_client().generate_chat_response(message.text, context)
         
-        # Create response message
+        # Ids and timestamps are fixed here so clients see exactly what is stored
+        user_message = {
+            **message.dict(),
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.now(timezone.utc)
+        }
         response_message = {
             "id": str(uuid.uuid4()),
             "role": "agent",
             "agent": message.agent or "AI Assistant",
             "text": ai_response,
-            "timestamp": datetime.now(),
+            "timestamp": datetime.now(timezone.utc),
             "metadata": {}
         }
         
-        # Save to chat history
-        await chat_service.save_message(message.dict())
-        await chat_service.save_message(response_message)
+        # Save to chat history once the response has been sent
+        background_tasks.add_task(persist_chat_exchange, user_message, dict(response_message))
         
         # Broadcast via WebSocket
-        await ws_manager.broadcast({
+        ws_manager.publish({
             "type": "chat_message",
             "data": response_message
         })
@@ -219,10 +500,41 @@ async def send_chat_message(message: ChatMessage):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/chat/history")
-async def get_chat_history(limit: int = 50):
-    """Get chat history"""
+async def get_chat_history(
+    limit: int = 50,
+    before_timestamp: Optional[datetime] = None,
+    before_id: Optional[str] = None
+):
+    """Get chat history; pass the timestamp and id of the oldest message shown to page further back"""
+    if (before_timestamp is None) != (before_id is None):
+        raise HTTPException(status_code=400, detail="before_timestamp and before_id must be given together")
+    
     try:
-        return await chat_service.get_history(limit)
+        if before_id is not None:
+            # Older pages are never in Redis; the keyset query seeks straight to them
+            async with async_session() as db:
+                rows = await crud.get_chat_messages(db, before=(before_timestamp, before_id), limit=limit)
+            return [crud.chat_message_to_dict(row) for row in reversed(rows)]
+        
+        recent = await redis_client.get_chat_messages(limit)
+        if recent is not None and len(recent) >= limit:
+            return recent
+        
+        # Redis missed or holds less than asked for (restart, eviction, TTL); the database has it all
+        try:
+            async with async_session() as db:
+                rows = await crud.get_chat_messages(db, limit=limit)
+        except Exception as e:
+            logger.warning(f"Chat history backfill from the database failed: {e}")
+            return recent if recent is not None else await chat_service.get_history(limit)
+        
+        history = [crud.chat_message_to_dict(row) for row in reversed(rows)]
+        # Messages still waiting in the write queue are only in Redis, and are the newest
+        stored_ids = {message["id"] for message in history}
+        history.extend(message for message in recent or [] if message.get("id") not in stored_ids)
+        history = history[-limit:] if limit > 0 else []
+        await redis_client.seed_chat_messages(history)
+        return history
     except Exception as e:
         logger.error(f"Error getting chat history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -232,26 +544,19 @@ async def get_chat_history(limit: int = 50):
 async def apply_patch(request: PatchRequest):
     """Apply patches to UI schema, style spec, or code"""
     try:
-        # Get current manifest
-        manifest = await get_preview_manifest()
-        
-        # Find the variant
-        variant = next((v for v in manifest["variants"] if v["id"] == request.variant_id), None)
+        # Patch a private deep copy so the cached manifest is never touched
+        manifest, variant = patch_manifest(
+            await get_preview_manifest(),
+            request.variant_id,
+            request.target,
+            request.patches
+        )
         if not variant:
             raise HTTPException(status_code=404, detail="Variant not found")
         
-        # Apply patches based on target
-        if request.target == "UI_SCHEMA":
-            # Apply patches to UI schema
-            updated_schema = apply_json_patches(manifest.get("ui_schema", {}), request.patches)
-            manifest["ui_schema"] = updated_schema
-        elif request.target == "STYLE_SPEC":
-            # Apply patches to style spec
-            updated_style_spec = apply_json_patches(variant["style_spec"], request.patches)
-            variant["style_spec"] = updated_style_spec
-        elif request.target == "code":
+        if request.target == "code":
             # Regenerate code with updated schema/style
-            code_files = await gemini_client.generate_code(
+            code_files = await get_gemini_client().generate_code(
                 manifest.get("ui_schema", {}),
                 variant["style_spec"],
                 request.variant_id
@@ -265,11 +570,10 @@ async def apply_patch(request: PatchRequest):
             variant["preview"] = preview_path
         
         # Save updated manifest
-        with open("generated/preview-manifest.json", "w") as f:
-            json.dump(manifest, f, indent=2)
+        await save_manifest(manifest)
         
         # Broadcast update
-        await ws_manager.broadcast({
+        ws_manager.publish({
             "type": "patch_applied",
             "data": {"variant_id": request.variant_id, "target": request.target}
         })
@@ -279,6 +583,10 @@ async def apply_patch(request: PatchRequest):
             "updated_manifest": manifest
         }
         
+    except HTTPException:
+        raise
+    except (jsonpatch.JsonPatchException, JsonPointerException) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid patch: {e}")
     except Exception as e:
         logger.error(f"Error applying patch: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -312,84 +620,130 @@ async def export_variants(request: ExportRequest):
         logger.error(f"Error exporting variants: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+EXPORTS_DIR = "exports"
+
+# When set (e.g. "/protected-exports/"), nginx streams the file via X-Accel-Redirect
+EXPORTS_ACCEL_PREFIX = os.getenv("EXPORTS_ACCEL_PREFIX")
+
 @app.get("/api/download/{filename}")
 async def download_file(filename: str):
     """Download exported file"""
-    file_path = f"exports/{filename}"
-    if os.path.exists(file_path):
-        return FileResponse(file_path, filename=filename)
-    else:
+    if os.path.basename(filename) != filename:
         raise HTTPException(status_code=404, detail="File not found")
+    
+    file_path = os.path.join(EXPORTS_DIR, filename)
+    try:
+        st = await asyncio.to_thread(os.stat, file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    if EXPORTS_ACCEL_PREFIX:
+        return Response(headers={
+            "X-Accel-Redirect": f"{EXPORTS_ACCEL_PREFIX.rstrip('/')}/{filename}",
+            "Content-Disposition": f'attachment; filename="{filename}"'
+        })
+    
+    # Reuse our stat so FileResponse doesn't stat the file again before sendfile
+    return FileResponse(file_path, filename=filename, stat_result=st)
 
 # Agent endpoints
+# Static agent catalogue, built once at import and indexed by id
+_AGENTS_BY_ID: Dict[str, Dict[str, Any]] = {agent["id"]: agent for agent in [
+    {
+        "id": "architect",
+        "name": "Design Architect",
+        "role": "UI Structure",
+        "description": "Creates semantic UI schemas and component hierarchies",
+        "status": "idle",
+        "capabilities": ["UI Schema Generation", "Component Design", "Accessibility Planning"]
+    },
+    {
+        "id": "curator",
+        "name": "Style Curator",
+        "role": "Visual Design",
+        "description": "Crafts unique visual styles and design systems",
+        "status": "working",
+        "capabilities": ["Style Generation", "Color Theory", "Typography", "Trend Analysis"]
+    },
+    {
+        "id": "generator",
+        "name": "Code Generator",
+        "role": "Implementation",
+        "description": "Converts designs into production-ready code",
+        "status": "idle",
+        "capabilities": ["Next.js", "React", "TypeScript", "Tailwind CSS"]
+    },
+    {
+        "id": "previewer",
+        "name": "Preview Engine",
+        "role": "Live Preview",
+        "description": "Manages real-time preview generation and updates",
+        "status": "idle",
+        "capabilities": ["Live Preview", "Hot Reload", "Responsive Testing"]
+    },
+    {
+        "id": "qa",
+        "name": "QA Engineer",
+        "role": "Quality Assurance",
+        "description": "Ensures accessibility, performance, and code quality",
+        "status": "idle",
+        "capabilities": ["Accessibility Testing", "Performance Analysis", "Code Review"]
+    },
+    {
+        "id": "exporter",
+        "name": "Export Manager",
+        "role": "Deployment",
+        "description": "Packages and deploys final designs",
+        "status": "idle",
+        "capabilities": ["Export Generation", "Deployment", "Asset Optimization"]
+    }
+]}
+
 @app.get("/api/agents")
 async def get_agents():
     """Get available agents"""
-    return [
-        {
-            "id": "architect",
-            "name": "Design Architect",
-            "role": "UI Structure",
-            "description": "Creates semantic UI schemas and component hierarchies",
-            "status": "idle",
-            "last_activity": datetime.now(),
-            "capabilities": ["UI Schema Generation", "Component Design", "Accessibility Planning"]
-        },
-        {
-            "id": "curator",
-            "name": "Style Curator",
-            "role": "Visual Design",
-            "description": "Crafts unique visual styles and design systems",
-            "status": "working",
-            "last_activity": datetime.now(),
-            "capabilities": ["Style Generation", "Color Theory", "Typography", "Trend Analysis"]
-        },
-        {
-            "id": "generator",
-            "name": "Code Generator",
-            "role": "Implementation",
-            "description": "Converts designs into production-ready code",
-            "status": "idle",
-            "last_activity": datetime.now(),
-            "capabilities": ["Next.js", "React", "TypeScript", "Tailwind CSS"]
-        },
-        {
-            "id": "previewer",
-            "name": "Preview Engine",
-            "role": "Live Preview",
-            "description": "Manages real-time preview generation and updates",
-            "status": "idle",
-            "last_activity": datetime.now(),
-            "capabilities": ["Live Preview", "Hot Reload", "Responsive Testing"]
-        },
-        {
-            "id": "qa",
-            "name": "QA Engineer",
-            "role": "Quality Assurance",
-            "description": "Ensures accessibility, performance, and code quality",
-            "status": "idle",
-            "last_activity": datetime.now(),
-            "capabilities": ["Accessibility Testing", "Performance Analysis", "Code Review"]
-        },
-        {
-            "id": "exporter",
-            "name": "Export Manager",
-            "role": "Deployment",
-            "description": "Packages and deploys final designs",
-            "status": "idle",
-            "last_activity": datetime.now(),
-            "capabilities": ["Export Generation", "Deployment", "Asset Optimization"]
-        }
-    ]
+    last_activity = datetime.now(timezone.utc)
+    return [{**agent, "last_activity": last_activity} for agent in _AGENTS_BY_ID.values()]
 
 @app.get("/api/agents/{agent_id}")
 async def get_agent_status(agent_id: str):
     """Get specific agent status"""
-    agents = await get_agents()
-    agent = next((a for a in agents if a["id"] == agent_id), None)
+    agent = _AGENTS_BY_ID.get(agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
-    return agent
+    return {**agent, "last_activity": datetime.now(timezone.utc)}
+
+RELAY_RETRY_MAX_SECONDS = 30.0
+
+async def relay_worker_broadcasts():
+    """Forward worker broadcasts to WebSocket clients, resubscribing whenever the subscription drops"""
+    delay = 1.0
+    while True:
+        async for payload in redis_client.iter_broadcasts():
+            delay = 1.0
+            ws_manager.publish_bytes(payload)
+        logger.warning(f"Worker broadcast relay lost its subscription; resubscribing in {delay:.0f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, RELAY_RETRY_MAX_SECONDS)
+
+# CrewAI generation runs on Celery workers; updates arrive over Redis pub/sub
+@app.post("/api/crew/generate", status_code=202)
+async def queue_crew_generation(request: CrewGenerationRequest):
+    """Queue a CrewAI generation and return immediately"""
+    if not redis_client.is_connected():
+        # Workers report state through Redis; without it the task could never be looked up
+        raise HTTPException(status_code=503, detail="Crew generation requires Redis (REDIS_URL)")
+    project_id = request.project_id or str(uuid.uuid4())
+    task = await asyncio.to_thread(run_crew_generation.delay, request.design_intent, project_id)
+    return {"task_id": task.id, "project_id": project_id}
+
+@app.get("/api/crew/{project_id}")
+async def get_crew_generation(project_id: str):
+    """Get the state of a queued CrewAI generation"""
+    state = await redis_client.get_task_state(project_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    return state
 
 # Gemini API endpoints
 @app.post("/api/gemini")
@@ -440,10 +794,50 @@ async def get_performance_metrics():
             "accessibility_score": 0.88,
             "novelty_score": 0.85,
             "user_satisfaction": 0.90,
-            "timestamp": datetime.now()
+            "timestamp": datetime.now(timezone.utc)
         }
     ]
 
+# Batch endpoint
+BATCH_MAX_CONCURRENCY = 16
+
+# Reads are always batchable, as are POSTs that write nothing. Writes are refused:
+# batched items run concurrently with no shared transaction, so a failing item could
+# leave the others half-applied, and concurrent generations race on the one manifest
+BATCHABLE_POSTS = frozenset({"/api/gemini"})
+
+@app.post("/api/batch")
+async def run_batch(request: BatchRequest):
+    """Execute several API requests concurrently in-process"""
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://batch") as client:
+        async def run(item: BatchItem) -> Dict[str, Any]:
+            method = item.method.upper()
+            path = item.url.split("?", 1)[0]
+            if not path.startswith("/api/") or path == "/api/batch" or not (
+                method == "GET" or (method == "POST" and path in BATCHABLE_POSTS)
+            ):
+                return {"id": item.id, "status": 405, "body": {"detail": f"{method} {path} cannot be batched"}}
+            
+            try:
+                async with semaphore:
+                    response = await client.request(method, item.url, json=item.body)
+            except Exception as e:
+                logger.error(f"Error running batched request {item.id}: {e}")
+                return {"id": item.id, "status": 500, "body": {"detail": str(e)}}
+            
+            try:
+                body = response.json()
+            except ValueError:
+                body = response.text
+            return {"id": item.id, "status": response.status_code, "body": body}
+        
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(run(item)) for item in request.requests]
+    
+    return {"responses": [task.result() for task in tasks]}
+
 # WebSocket endpoint
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -452,42 +846,13 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
-            await ws_manager.handle_message(websocket, message)
+            await ws_manager.handle_message(websocket, data)
     except WebSocketDisconnect:
         ws_manager.disconnect(websocket)
 
-# Utility functions
-def apply_json_patches(obj: Dict[str, Any], patches: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Apply JSON patches to an object"""
-    result = obj.copy()
-    
-    for patch in patches:
-        op = patch.get("op")
-        path = patch.get("path", "")
-        value = patch.get("value")
-        
-        if op == "replace":
-            # Simple path replacement (for demo)
-            keys = path.strip("/").split("/")
-            current = result
-            for key in keys[:-1]:
-                current = current[key]
-            current[keys[-1]] = value
-        elif op == "add":
-            keys = path.strip("/").split("/")
-            current = result
-            for key in keys[:-1]:
-                if key not in current:
-                    current[key] = {}
-                current = current[key]
-            current[keys[-1]] = value
-    
-    return result
-
 # Mount static files
 app.mount("/previews", StaticFiles(directory="previews"), name="previews")
-app.mount("/exports", StaticFiles(directory="exports"), name="exports")
+app.mount("/exports", StaticFiles(directory=EXPORTS_DIR), name="exports")
 
 if __name__ == "__main__":
     import uvicorn
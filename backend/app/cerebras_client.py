@@ -5,26 +5,124 @@ High-performance AI inference using Cerebras Cloud SDK
 
 import os
 import asyncio
+import atexit
+import functools
+import hashlib
 import httpx
-import json
-from typing import Dict, List, Any, Optional, AsyncGenerator
+import orjson
+import re
+import time
+from typing import Dict, List, Any, Optional, AsyncGenerator, AsyncIterator, Tuple, Union
 import logging
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+# Coalesced streams flush once this many characters are buffered
+STREAM_FLUSH_CHARS = 512
+
+_JSON_OBJECT_START = re.compile(r"\s*\{")
+
+CODE_SYSTEM_PROMPT_TEMPLATE = """You are an expert {language} developer specializing in {framework}.
+        Generate clean, production-ready code that follows best practices.
+        Include proper error handling, type safety, and performance optimizations.
+        Ensure the code is well-documented and maintainable."""
+
+def _sse_data(line: bytes) -> Optional[bytes]:
+    """Return the payload of an SSE ``data:`` line, or None for any other line"""
+    if not line.startswith(b"data:"):
+        return None
+    data = line[6:] if line[5:6] == b" " else line[5:]
+    return data[:-1] if data.endswith(b"\r") else data
+
+async def _iter_sse_data(chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+    """
+    Yield SSE ``data:`` payloads from a raw byte stream
+    
+    Lines are sliced straight out of each network chunk; bytes are only joined
+    when a line spans chunk boundaries.
+    
+    Args:
+        chunks: Raw response body chunks
+        
+    Yields:
+        Payload bytes of each data line
+    """
+    pending: List[bytes] = []
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            if pending:
+                pending.append(chunk[start:end])
+                line = b"".join(pending)
+                pending.clear()
+            else:
+                line = chunk[start:end]
+            start = end + 1
+            
+            data = _sse_data(line)
+            if data is not None:
+                yield data
+        
+        if start < len(chunk):
+            pending.append(chunk[start:])
+    
+    if pending:
+        data = _sse_data(b"".join(pending))
+        if data is not None:
+            yield data
+
+# CrewAI-specific instructions appended to every agent system prompt
+_CREW_SUFFIX = """
+        
+        Instructions for CrewAI integration:
+        - Provide detailed, actionable responses
+        - Structure your output clearly and professionally
+        - Include specific technical details when relevant
+        - Consider the collaborative nature of multi-agent workflows
+        - Ensure your response can be effectively used by other agents in the workflow
+        """
+
+@functools.lru_cache(maxsize=1024)
+def _build_system_prompt_cached(base_prompt: str, agent_role: Optional[str]) -> str:
+    if agent_role:
+        return f"You are a {agent_role} with specialized expertise. {base_prompt}{_CREW_SUFFIX}"
+    return f"{base_prompt}{_CREW_SUFFIX}"
+
+@dataclass(slots=True, frozen=True)
+class Msg:
+    """Chat message; orjson serializes it as {"role": ..., "content": ...}"""
+    role: str
+    content: str
+
+# Message lists accept Msg instances or plain role/content dicts
+Message = Union[Msg, Dict[str, str]]
+
+@functools.lru_cache(maxsize=256)
+def _agent_prefix(system_prompt: str, agent_role: Optional[str]) -> Tuple[Msg, ...]:
+    """
+    Leading messages shared by every turn of an agent
+    
+    The prefix must stay byte-identical across requests: per-request data (project
+    ids, design intents, context) goes in later messages so the server's prompt
+    cache can reuse prefill for the system prompt.
+    """
+    return (Msg("system", _build_system_prompt_cached(system_prompt, agent_role)),)
+
 class CerebrasClient:
     """
     Cerebras AI client for high-performance inference
     Integrates with CrewAI for enhanced AI agent capabilities
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None):
         """
         Initialize Cerebras client
         
         Args:
             api_key: Cerebras API key (defaults to environment variable)
+            http_client: HTTP client to use (defaults to the app-wide client, or the module-wide pool)
         """
         self.api_key = api_key or os.environ.get("CEREBRAS_API_KEY")
         
@@ -35,14 +133,16 @@ class CerebrasClient:
         self.base_url = "https://api.cerebras.ai/v1"
         self.model = "llama3.1-8b"  # Use a more stable model
         
-        # HTTP client for direct API calls
-        self.http_client = httpx.AsyncClient(
-            timeout=httpx.Timeout(60.0),
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-        )
+        # Credentials are sent per request so the HTTP client can be shared across the app;
+        # the headers and URL are parsed once here rather than on every call
+        self.headers = httpx.Headers({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+        self._completions_url = httpx.URL(f"{self.base_url}/chat/completions")
+        
+        # HTTP client for direct API calls; clients are always shared, so instances never close them
+        self.http_client = http_client or _shared_http_client or _get_http_client()
         
         # Default configuration optimized for CrewAI agents
         self.default_config = {
@@ -52,40 +152,93 @@ class CerebrasClient:
             "stream": False
         }
         
+        # Encoded model and default settings, keyed by the set of overridden parameters
+        self._payload_prefixes: Dict[frozenset, bytes] = {}
+        
+        # In-flight completions keyed by a hash of the request body
+        self._inflight: Dict[bytes, asyncio.Task] = {}
+        
         logger.info("Cerebras client initialized successfully")
     
     async def generate_completion(
         self, 
-        messages: List[Dict[str, str]], 
+        messages: List[Message], 
         **kwargs
     ) -> str:
         """
         Generate a single completion using Cerebras
         
+        Identical concurrent requests share a single API call.
+        
         Args:
-            messages: List of message objects with 'role' and 'content'
+            messages: List of Msg objects or dicts with 'role' and 'content'
             **kwargs: Additional parameters for the completion
             
         Returns:
             Generated text completion
         """
-        try:
-            config = {**self.default_config, **kwargs}
-            config["stream"] = False  # Ensure non-streaming for single completion
+        # Ensure non-streaming for single completion
+        body = self._serialize_payload(messages, {**kwargs, "stream": False})
+        key = hashlib.blake2b(body, digest_size=16).digest()
+        
+        # Tasks can only be awaited from the loop that runs them
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._post_completion(body))
+            self._inflight[key] = task
             
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                **config
-            }
+            def _forget(done: asyncio.Task) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            
+            task.add_done_callback(_forget)
+        
+        # Shielded so one cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(task)
+    
+    def _serialize_payload(self, messages: List[Message], overrides: Dict[str, Any]) -> bytes:
+        """
+        Serialize a request payload, reusing the pre-encoded model and default settings
+        
+        Args:
+            messages: List of Msg objects or dicts with 'role' and 'content'
+            overrides: Parameters that replace or extend the defaults
             
+        Returns:
+            JSON request body
+        """
+        override_keys = frozenset(overrides)
+        prefix = self._payload_prefixes.get(override_keys)
+        if prefix is None:
+            base = {"model": self.model, **self.default_config}
+            # Encoded without the closing brace so the per-call fields can be appended
+            prefix = orjson.dumps({k: v for k, v in base.items() if k not in override_keys})[:-1]
+            self._payload_prefixes[override_keys] = prefix
+        
+        tail = orjson.dumps({"messages": messages, **overrides}, option=orjson.OPT_SORT_KEYS)
+        if prefix == b"{":
+            return tail
+        return prefix + b"," + tail[1:]
+    
+    async def _post_completion(self, body: bytes) -> str:
+        """
+        Send a serialized completion request
+        
+        Args:
+            body: JSON request body
+            
+        Returns:
+            Generated text completion
+        """
+        try:
             response = await self.http_client.post(
-                f"{self.base_url}/chat/completions",
-                json=payload
+                self._completions_url,
+                content=body,
+                headers=self.headers
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 return result["choices"][0]["message"]["content"]
             else:
                 error_msg = f"API request failed with status {response.status_code}: {response.text}"
@@ -98,57 +251,102 @@ class CerebrasClient:
     
     async def generate_streaming_completion(
         self, 
-        messages: List[Dict[str, str]], 
+        messages: List[Message], 
+        coalesce: int = 0,
         **kwargs
     ) -> AsyncGenerator[str, None]:
         """
         Generate streaming completion using Cerebras
         
         Args:
-            messages: List of message objects with 'role' and 'content'
+            messages: List of Msg objects or dicts with 'role' and 'content'
+            coalesce: Yield every N tokens (or sooner once STREAM_FLUSH_CHARS
+                characters are buffered) instead of every token; 0 disables buffering
             **kwargs: Additional parameters for the completion
             
         Yields:
             Streaming text chunks
         """
         try:
-            config = {**self.default_config, **kwargs}
-            config["stream"] = True
+            if coalesce <= 0:
+                async for content in self._stream_content(messages, **kwargs):
+                    yield content
+                return
             
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                **config
-            }
+            buffer: List[str] = []
+            buffered_chars = 0
+            async for content in self._stream_content(messages, **kwargs):
+                buffer.append(content)
+                buffered_chars += len(content)
+                if len(buffer) >= coalesce or buffered_chars >= STREAM_FLUSH_CHARS:
+                    yield "".join(buffer)
+                    buffer.clear()
+                    buffered_chars = 0
             
-            async with self.http_client.stream(
-                "POST",
-                f"{self.base_url}/chat/completions",
-                json=payload
-            ) as response:
-                if response.status_code != 200:
-                    error_msg = f"Streaming request failed with status {response.status_code}"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
-                
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data_str = line[6:]  # Remove "data: " prefix
-                        if data_str.strip() == "[DONE]":
-                            break
-                        try:
-                            chunk_data = json.loads(data_str)
-                            if (chunk_data.get("choices") and 
-                                len(chunk_data["choices"]) > 0 and 
-                                chunk_data["choices"][0].get("delta", {}).get("content")):
-                                yield chunk_data["choices"][0]["delta"]["content"]
-                        except json.JSONDecodeError:
-                            continue
+            if buffer:
+                yield "".join(buffer)
                     
         except Exception as e:
             logger.error(f"Error generating streaming completion: {str(e)}")
             raise
     
+    async def generate_streaming_bytes(
+        self, 
+        messages: List[Message], 
+        **kwargs
+    ) -> bytes:
+        """
+        Stream a completion and collect the full text as UTF-8 bytes
+        
+        Tokens are appended to a single buffer, so callers that need the whole
+        response avoid holding and joining thousands of small strings.
+        
+        Args:
+            messages: List of Msg objects or dicts with 'role' and 'content'
+            **kwargs: Additional parameters for the completion
+            
+        Returns:
+            Generated text, UTF-8 encoded
+        """
+        try:
+            buffer = bytearray()
+            async for content in self._stream_content(messages, **kwargs):
+                buffer += content.encode()
+            return bytes(buffer)
+            
+        except Exception as e:
+            logger.error(f"Error generating streaming completion: {str(e)}")
+            raise
+    
+    async def _stream_content(
+        self, 
+        messages: List[Message], 
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """Yield each content delta of a streaming completion"""
+        async with self.http_client.stream(
+            "POST",
+            self._completions_url,
+            content=self._serialize_payload(messages, {**kwargs, "stream": True}),
+            headers=self.headers
+        ) as response:
+            if response.status_code != 200:
+                error_msg = f"Streaming request failed with status {response.status_code}"
+                logger.error(error_msg)
+                raise Exception(error_msg)
+            
+            async for data in _iter_sse_data(response.aiter_bytes()):
+                if data == b"[DONE]":
+                    break
+                try:
+                    chunk_data = orjson.loads(data)
+                    if (chunk_data.get("choices") and 
+                        len(chunk_data["choices"]) > 0 and 
+                        chunk_data["choices"][0].get("delta", {}).get("content")):
+                        yield chunk_data["choices"][0]["delta"]["content"]
+                except orjson.JSONDecodeError:
+                    continue
+    
     async def generate_agent_response(
         self,
         system_prompt: str,
@@ -170,23 +368,12 @@ class CerebrasClient:
         Returns:
             Agent's response
         """
-        messages = [
-            {
-                "role": "system",
-                "content": self._build_system_prompt(system_prompt, agent_role)
-            }
-        ]
+        messages = list(_agent_prefix(system_prompt, agent_role))
         
         if context:
-            messages.append({
-                "role": "system",
-                "content": f"Context: {context}"
-            })
-        
-        messages.append({
-            "role": "user",
-            "content": user_input
-        })
+            messages.append(Msg("system", f"Context: {context}"))
+        
+        messages.append(Msg("user", user_input))
         
         # Optimize settings for agent responses
         agent_config = {
@@ -197,6 +384,36 @@ class CerebrasClient:
         
         return await self.generate_completion(messages, **agent_config)
     
+    @staticmethod
+    def _code_request(
+        requirements: str,
+        language: str,
+        framework: str,
+        context: Optional[str],
+        kwargs: Dict[str, Any]
+    ) -> Tuple[List[Message], Dict[str, Any]]:
+        """Messages and completion settings for a code generation request"""
+        system_prompt = CODE_SYSTEM_PROMPT_TEMPLATE.format(language=language, framework=framework)
+        
+        user_prompt = f"Generate {language} code using {framework} for the following requirements:\n\n{requirements}"
+        
+        if context:
+            user_prompt += f"\n\nAdditional context:\n{context}"
+        
+        messages = [
+            Msg("system", system_prompt),
+            Msg("user", user_prompt)
+        ]
+        
+        # Optimize for code generation
+        code_config = {
+            "temperature": 0.3,  # Lower temperature for more deterministic code
+            "max_completion_tokens": 24576,  # Larger for complex code
+            **kwargs
+        }
+        
+        return messages, code_config
+    
     async def generate_code(
         self,
         requirements: str,
@@ -218,30 +435,36 @@ class CerebrasClient:
         Returns:
             Generated code
         """
-        system_prompt = f"""You are an expert {language} developer specializing in {framework}.
-        Generate clean, production-ready code that follows best practices.
-        Include proper error handling, type safety, and performance optimizations.
-        Ensure the code is well-documented and maintainable."""
-        
-        user_prompt = f"Generate {language} code using {framework} for the following requirements:\n\n{requirements}"
-        
-        if context:
-            user_prompt += f"\n\nAdditional context:\n{context}"
-        
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        
-        # Optimize for code generation
-        code_config = {
-            "temperature": 0.3,  # Lower temperature for more deterministic code
-            "max_completion_tokens": 24576,  # Larger for complex code
-            **kwargs
-        }
-        
+        messages, code_config = self._code_request(requirements, language, framework, context, kwargs)
         return await self.generate_completion(messages, **code_config)
     
+    async def generate_code_stream(
+        self,
+        requirements: str,
+        language: str = "typescript",
+        framework: str = "react",
+        context: Optional[str] = None,
+        coalesce: int = 200,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream generated code as it is produced
+        
+        Args:
+            requirements: Code requirements and specifications
+            language: Programming language (default: typescript)
+            framework: Framework (default: react)
+            context: Additional context
+            coalesce: Tokens per yielded chunk, see generate_streaming_completion
+            **kwargs: Additional parameters
+            
+        Yields:
+            Chunks of generated code
+        """
+        messages, code_config = self._code_request(requirements, language, framework, context, kwargs)
+        async for chunk in self.generate_streaming_completion(messages, coalesce=coalesce, **code_config):
+            yield chunk
+    
     async def analyze_and_improve(
         self,
         content: str,
@@ -271,23 +494,26 @@ class CerebrasClient:
         {goals_text}"""
         
         messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Analyze the following content:\n\n{content}"}
+            Msg("system", system_prompt),
+            Msg("user", f"Analyze the following content:\n\n{content}")
         ]
         
         response = await self.generate_completion(messages, **kwargs)
         
-        try:
-            import json
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Fallback if response isn't valid JSON
-            return {
-                "analysis": response,
-                "issues": [],
-                "improvements": [],
-                "score": 0.8
-            }
+        # Only attempt a full parse when the response opens like a JSON object
+        if _JSON_OBJECT_START.match(response):
+            try:
+                return orjson.loads(response)
+            except orjson.JSONDecodeError:
+                pass
+        
+        # Fallback if response isn't valid JSON
+        return {
+            "analysis": response,
+            "issues": [],
+            "improvements": [],
+            "score": 0.8
+        }
     
     def _build_system_prompt(self, base_prompt: str, agent_role: Optional[str] = None) -> str:
         """
@@ -300,23 +526,7 @@ class CerebrasClient:
         Returns:
             Enhanced system prompt
         """
-        enhanced_prompt = base_prompt
-        
-        if agent_role:
-            enhanced_prompt = f"You are a {agent_role} with specialized expertise. {enhanced_prompt}"
-        
-        # Add CrewAI-specific instructions
-        enhanced_prompt += """
-        
-        Instructions for CrewAI integration:
-        - Provide detailed, actionable responses
-        - Structure your output clearly and professionally
-        - Include specific technical details when relevant
-        - Consider the collaborative nature of multi-agent workflows
-        - Ensure your response can be effectively used by other agents in the workflow
-        """
-        
-        return enhanced_prompt
+        return _build_system_prompt_cached(base_prompt, agent_role)
     
     async def health_check(self) -> Dict[str, Any]:
         """
@@ -327,33 +537,31 @@ class CerebrasClient:
         """
         try:
             test_messages = [
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": "Say 'OK' to confirm you're working."}
+                Msg("system", "You are a helpful assistant."),
+                Msg("user", "Say 'OK' to confirm you're working.")
             ]
             
-            start_time = datetime.utcnow()
+            start_time = time.perf_counter()
             response = await self.generate_completion(
                 test_messages, 
                 max_completion_tokens=10,
                 temperature=0.1
             )
-            end_time = datetime.utcnow()
-            
-            response_time = (end_time - start_time).total_seconds()
+            response_time = time.perf_counter() - start_time
             
             return {
                 "status": "healthy",
                 "model": self.model,
                 "response_time_seconds": response_time,
                 "test_response": response.strip(),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": datetime.now(timezone.utc).isoformat()
             }
             
         except Exception as e:
             return {
                 "status": "unhealthy",
                 "error": str(e),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": datetime.now(timezone.utc).isoformat()
             }
     
     async def __aenter__(self):
@@ -362,11 +570,58 @@ class CerebrasClient:
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        await self.http_client.aclose()
+        # The HTTP client outlives this instance; see aclose_http_client
 
 # Singleton instance for global use
 _cerebras_client: Optional[CerebrasClient] = None
 
+# App-wide HTTP client registered by the FastAPI lifespan
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+def set_shared_http_client(http_client: Optional[httpx.AsyncClient]) -> None:
+    """Register the HTTP client new Cerebras clients should reuse"""
+    global _shared_http_client
+    _shared_http_client = http_client
+
+# Module-wide pooled client used when no app-wide client is registered
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Get the module-wide HTTP client, creating it on first use"""
+    global _HTTP_CLIENT
+    
+    if _HTTP_CLIENT is None:
+        pool_size = int(os.environ.get("CEREBRAS_POOL", "100"))
+        _HTTP_CLIENT = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=30
+            ),
+            http2=True
+        )
+        atexit.register(_close_http_client_at_exit)
+    
+    return _HTTP_CLIENT
+
+def _close_http_client_at_exit() -> None:
+    """Best-effort close for processes that exit without running the app lifespan"""
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        return
+    try:
+        asyncio.run(aclose_http_client())
+    except Exception as e:
+        logger.debug(f"Could not close Cerebras HTTP client at exit: {e}")
+
+async def aclose_http_client() -> None:
+    """Close the module-wide HTTP client, if it was created"""
+    global _HTTP_CLIENT
+    
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
+
 def get_cerebras_client() -> CerebrasClient:
     """Get singleton Cerebras client instance"""
     global _cerebras_client
@@ -376,6 +631,24 @@ def get_cerebras_client() -> CerebrasClient:
     
     return _cerebras_client
 
+def install_uvloop() -> bool:
+    """
+    Use uvloop for event loops created from here on
+    
+    uvicorn already picks uvloop when it is installed; scripts that drive the
+    client with asyncio.run should call this first.
+    
+    Returns:
+        True if uvloop was installed
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    
+    uvloop.install()
+    return True
+
 async def initialize_cerebras_client(api_key: Optional[str] = None) -> CerebrasClient:
     """Initialize Cerebras client with health check"""
     global _cerebras_client
@@ -3,17 +3,81 @@ LangChain integration for Cerebras AI
 Custom LLM wrapper for CrewAI compatibility
 """
 
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Coroutine, Dict, List, Optional, Tuple, TypeVar, Union
 from langchain_core.language_models.llms import LLM
 from langchain_core.callbacks.manager import CallbackManagerForLLMRun
 from langchain_core.outputs import Generation, LLMResult
 import asyncio
+import re
+from functools import lru_cache
 from .cerebras_client import CerebrasClient
 import logging
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Event loop that owns the shared HTTP client; sync callers in worker threads run their I/O on it
+_owner_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def bind_event_loop(loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Register the application event loop that sync callers should delegate to"""
+    global _owner_loop
+    _owner_loop = loop
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code
+    
+    From a worker thread (e.g. a CrewAI kickoff in asyncio.to_thread) the coroutine
+    is scheduled on the bound application loop, so network I/O from every agent
+    overlaps on one loop and reuses its connection pool. Without a bound loop it
+    runs on a fresh one.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        coro.close()
+        raise RuntimeError("run_async called inside a running event loop; await the coroutine instead")
+    
+    loop = _owner_loop
+    if loop is not None and loop.is_running():
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    return asyncio.run(coro)
+
+@lru_cache(maxsize=64)
+def _stop_pattern(stop: Tuple[str, ...]) -> "re.Pattern[str]":
+    return re.compile("|".join(re.escape(seq) for seq in stop))
+
+def _truncate_at_stop(response: str, stop: List[str]) -> str:
+    """
+    Cut the response at the earliest occurrence of any stop sequence
+    
+    Args:
+        response: Generated text
+        stop: Stop sequences
+        
+    Returns:
+        Text before the first stop sequence
+    """
+    stop = [seq for seq in stop if seq]
+    if len(stop) > 4:
+        # One pass over the response with a cached alternation instead of one find per sequence
+        match = _stop_pattern(tuple(stop)).search(response)
+        return response[:match.start()] if match else response
+    
+    cut = min((i for seq in stop if (i := response.find(seq)) != -1), default=-1)
+    return response[:cut] if cut >= 0 else response
+
 class CerebrasLLM(LLM):
     """
     LangChain LLM wrapper for Cerebras AI
@@ -59,7 +123,10 @@ class CerebrasLLM(LLM):
         **kwargs: Any,
     ) -> str:
         """
-        Call Cerebras AI to generate text
+        Call Cerebras AI synchronously
+        
+        Only for callers without an event loop, such as CrewAI worker threads,
+        scripts and tests. Async callers should go through ainvoke/_acall.
         
         Args:
             prompt: Input prompt
@@ -70,66 +137,7 @@ class CerebrasLLM(LLM):
         Returns:
             Generated text
         """
-        try:
-            # Convert prompt to messages format
-            messages = [
-                {"role": "user", "content": prompt}
-            ]
-            
-            # Merge parameters
-            params = {
-                "temperature": self.temperature,
-                "max_tokens": self.max_completion_tokens,  # litellm expects max_tokens
-                "top_p": self.top_p,
-                "model": self.model_name,  # litellm expects model
-                **kwargs
-            }
-            
-            # Handle stop sequences
-            if stop:
-                params["stop"] = stop
-            
-            # Use asyncio to call the async method
-            loop = None
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            if loop.is_running():
-                # If we're already in an event loop, create a new task
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(
-                        lambda: loop.run_until_complete(
-                            self.cerebras_client.generate_completion(messages, **params)
-                        )
-                    )
-                    response = future.result()
-            else:
-                # If no event loop is running, we can use run_until_complete
-                response = loop.run_until_complete(
-                    self.cerebras_client.generate_completion(messages, **params)
-                )
-            
-            # Post-process for stop sequences
-            if stop and response:
-                for stop_seq in stop:
-                    if stop_seq in response:
-                        response = response.split(stop_seq)[0]
-            
-            # Notify callback manager if provided
-            if run_manager:
-                run_manager.on_llm_end(LLMResult(generations=[[Generation(text=response)]]))
-            
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error in Cerebras LLM call: {str(e)}")
-            if run_manager:
-                run_manager.on_llm_error(e)
-            raise
+        return run_async(self._acall(prompt, stop=stop, run_manager=run_manager, **kwargs))
     
     async def _acall(
         self,
@@ -173,9 +181,7 @@ class CerebrasLLM(LLM):
             
             # Post-process for stop sequences
             if stop and response:
-                for stop_seq in stop:
-                    if stop_seq in response:
-                        response = response.split(stop_seq)[0]
+                response = _truncate_at_stop(response, stop)
             
             # Notify callback manager if provided
             if run_manager:
@@ -229,90 +235,6 @@ class CerebrasAgentLLM(CerebrasLLM):
         self.agent_role = agent_role
         self.system_prompt = system_prompt
     
-    def _call(
-        self,
-        prompt: str,
-        stop: Optional[List[str]] = None,
-        run_manager: Optional[CallbackManagerForLLMRun] = None,
-        **kwargs: Any,
-    ) -> str:
-        """
-        Enhanced call method for agent-specific responses
-        
-        Args:
-            prompt: Input prompt
-            stop: Stop sequences
-            run_manager: Callback manager
-            **kwargs: Additional parameters
-            
-        Returns:
-            Generated text optimized for agent workflows
-        """
-        try:
-            # Use the specialized agent response method
-            params = {
-                "temperature": self.temperature,
-                "max_tokens": self.max_completion_tokens,  # litellm expects max_tokens
-                "top_p": self.top_p,
-                "model": self.model_name,  # litellm expects model
-                **kwargs
-            }
-            
-            # Handle stop sequences
-            if stop:
-                params["stop"] = stop
-            
-            # Use asyncio to call the async method
-            loop = None
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            if loop.is_running():
-                # If we're already in an event loop, create a new task
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(
-                        lambda: loop.run_until_complete(
-                            self.cerebras_client.generate_agent_response(
-                                system_prompt=self.system_prompt or "You are a helpful AI assistant.",
-                                user_input=prompt,
-                                agent_role=self.agent_role,
-                                **params
-                            )
-                        )
-                    )
-                    response = future.result()
-            else:
-                response = loop.run_until_complete(
-                    self.cerebras_client.generate_agent_response(
-                        system_prompt=self.system_prompt or "You are a helpful AI assistant.",
-                        user_input=prompt,
-                        agent_role=self.agent_role,
-                        **params
-                    )
-                )
-            
-            # Post-process for stop sequences
-            if stop and response:
-                for stop_seq in stop:
-                    if stop_seq in response:
-                        response = response.split(stop_seq)[0]
-            
-            # Notify callback manager if provided
-            if run_manager:
-                run_manager.on_llm_end(LLMResult(generations=[[Generation(text=response)]]))
-            
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error in Cerebras Agent LLM call: {str(e)}")
-            if run_manager:
-                run_manager.on_llm_error(e)
-            raise
-    
     async def _acall(
         self,
         prompt: str,
@@ -345,9 +267,7 @@ class CerebrasAgentLLM(CerebrasLLM):
             
             # Post-process for stop sequences
             if stop and response:
-                for stop_seq in stop:
-                    if stop_seq in response:
-                        response = response.split(stop_seq)[0]
+                response = _truncate_at_stop(response, stop)
             
             # Notify callback manager if provided
             if run_manager:
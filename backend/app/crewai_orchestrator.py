@@ -3,35 +3,322 @@ CrewAI Integration for Magic UI Studio Pro
 Advanced AI agent orchestration with real-time status updates
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Mapping, Optional, Tuple
+import array
 import asyncio
-import json
+import functools
+import hashlib
+import html
+import os
+import re
+import string
+import time
+import orjson
+from collections import OrderedDict
+from contextvars import ContextVar
 from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from types import MappingProxyType
 from crewai import Agent, Task, Crew, Process
 from langchain.tools import Tool
 import logging
 from .models import AgentStatus, DesignIntentResponse, AgentStatusResponse
 from .websocket_manager import WebSocketManager
-from .cerebras_client import CerebrasClient, get_cerebras_client
-from .cerebras_langchain import create_cerebras_llm
+from .cerebras_client import CODE_SYSTEM_PROMPT_TEMPLATE, CerebrasClient, get_cerebras_client
+from .cerebras_langchain import bind_event_loop, create_cerebras_llm, run_async
+from .llm_cache import SemanticCache, semantic_cache
 
 logger = logging.getLogger(__name__)
 
+# CrewAI's verbose step logging is synchronous stdout output; opt in for debugging only
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "false").lower() == "true"
+
+# Agent status updates within this window are broadcast together
+STATUS_BATCH_WINDOW_SECONDS = 0.05
+TASK_DESCRIPTION_CACHE_SIZE = 128
+
+# Upper bound on crews calling the Cerebras backend at the same time
+MAX_CONCURRENT_CREWS = 3
+
+# Rough size of a generated component, used to scale streamed code progress between 25% and 85%
+EXPECTED_CODE_TOKENS = 4000
+CHARS_PER_TOKEN = 4
+
+CODE_TEMPERATURE = 0.3
+PREVIEW_TEMPERATURE = 0.4
+
+# Generations sampled hotter than this are too varied to serve from cache
+CACHEABLE_TEMPERATURE = 0.5
+
+_PREVIEW_SYSTEM_PROMPT = "You are an expert at converting React components to standalone HTML. Create pixel-perfect HTML previews that work in iframes."
+
+# Preview pages are built from templates parsed once; only the substituted values vary
+_PREVIEW_WRAPPER_TEMPLATE = string.Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Generated Component Preview</title>
+    <script src="https://cdn.tailwindcss.com"></script>
+    <style>
+        body { margin: 0; padding: 16px; background: #f9fafb; }
+        .component-container { max-width: 100%; margin: 0 auto; }
+    </style>
+</head>
+<body>
+    <div class="component-container">
+        $content
+    </div>
+</body>
+</html>""")
+
+_PREVIEW_ERROR_TEMPLATE = string.Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Preview Error</title>
+    <script src="https://cdn.tailwindcss.com"></script>
+</head>
+<body class="bg-gray-50 p-8">
+    <div class="max-w-md mx-auto bg-white rounded-lg shadow-md p-6 text-center">
+        <div class="text-red-500 text-2xl mb-4">⚠️</div>
+        <h2 class="text-lg font-semibold text-gray-900 mb-2">Preview Generation Failed</h2>
+        <p class="text-gray-600 text-sm">Unable to generate preview: $error</p>
+        <div class="mt-4 p-3 bg-gray-100 rounded text-xs text-left overflow-auto">
+            <code>$code_snippet...</code>
+        </div>
+    </div>
+</body>
+</html>""")
+
+_JSX_RETURN = re.compile(r"\breturn\s*\(")
+_JSX_DYNAMIC = re.compile(r"\buse[A-Z]\w*\s*\(|\bfetch\s*\(|\bprops\b|\bthis\.")
+_JSX_TAG = re.compile(r"<(/?)([A-Za-z][\w.:-]*)?((?:\"[^\"]*\"|'[^']*'|[^'\">])*?)(/?)>")
+_JSX_ATTRIBUTE_RENAMES = (("className=", "class="), ("htmlFor=", "for="))
+_VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"
+})
+
+def _static_jsx_to_html(code: str) -> Optional[str]:
+    """
+    Render a component's JSX as HTML when it is plain static markup
+    
+    Only single-return components without hooks, props, expressions or nested
+    components qualify; anything else returns None so the caller falls back to
+    the LLM conversion.
+    """
+    if _JSX_DYNAMIC.search(code):
+        return None
+    returns = _JSX_RETURN.findall(code)
+    if len(returns) != 1:
+        return None
+    
+    # Take the parenthesised JSX after `return`, skipping over quoted attribute values
+    start = _JSX_RETURN.search(code).end()
+    depth, quote = 1, None
+    for end in range(start, len(code)):
+        char = code[end]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                break
+    else:
+        return None
+    jsx = code[start:end].strip()
+    if not jsx.startswith("<") or "{" in jsx or "}" in jsx:
+        return None
+    
+    def convert(match: "re.Match[str]") -> str:
+        closing, tag, attributes, self_closing = match.groups()
+        if not tag:
+            return ""  # fragments
+        if not tag[0].islower() or "." in tag:
+            raise ValueError("component element")
+        for jsx_name, html_name in _JSX_ATTRIBUTE_RENAMES:
+            attributes = attributes.replace(jsx_name, html_name)
+        if closing:
+            return f"</{tag}>"
+        if self_closing and tag not in _VOID_ELEMENTS:
+            return f"<{tag}{attributes.rstrip()}></{tag}>"
+        return f"<{tag}{attributes.rstrip()}>"
+    
+    try:
+        return _JSX_TAG.sub(convert, jsx)
+    except ValueError:
+        return None
+
+def _prompt_version(*prompts: str) -> str:
+    """Short hash of generation prompts, so editing a prompt starts a fresh cache namespace"""
+    return hashlib.sha256("\0".join(prompts).encode()).hexdigest()[:12]
+
+# Task description templates, filled from the design intent per request
+# Placeholder tool results, serialized once rather than on every tool call
+_TOOL_OUTPUTS: Dict[str, str] = {
+    "requirements": orjson.dumps({"patterns": ["responsive", "accessible"], "complexity": "medium"}).decode(),
+    "components": orjson.dumps({"components": ["header", "hero", "features", "footer"]}).decode(),
+    "styles": orjson.dumps({"styles": ["minimalist", "glassmorphism", "modern"]}).decode(),
+    "novelty": orjson.dumps({"novelty_scores": [0.85, 0.78, 0.92]}).decode(),
+    "responsive": orjson.dumps({"responsive_test": "passed"}).decode(),
+    "accessibility": orjson.dumps({"accessibility_score": 0.94}).decode(),
+    "performance": orjson.dumps({"performance_score": 0.88}).decode(),
+    "deployment": orjson.dumps({"deployment_config": "configured"}).decode(),
+}
+
+# Static instructions come first and intent fields last, so descriptions share the longest possible prefix
+_TASK_TEMPLATES: Dict[str, str] = {
+    "architecture": """
+            Analyze the user's design intent and create a comprehensive UI architecture plan.
+            
+            Create a detailed component hierarchy, define responsive breakpoints,
+            and establish accessibility requirements. Output should be a JSON structure
+            with component specifications and layout guidelines.
+            
+            Page Type: {page_type}
+            Components Needed: {components}
+            Layout Structure: {layout}
+            Complexity Level: {complexity}
+            Target Audience: {target_audience}
+            Business Domain: {business_domain}
+            """,
+    "style": """
+            Based on the user's design intent, create unique visual styles.
+            
+            Generate 3 distinct style variations with high novelty scores.
+            Include color palettes, typography, spacing, and visual effects.
+            Calculate novelty scores for each variation.
+            
+            Style Preferences: {style_preferences}
+            Brand Personality: {brand_personality}
+            Business Domain: {business_domain}
+            """,
+    "code": """
+            Generate production-ready React/Next.js code based on architecture and styles.
+            
+            Create clean, maintainable TypeScript code with proper component structure,
+            responsive design, and accessibility features. Include proper imports,
+            error handling, and performance optimizations.
+            
+            Technical Requirements: {technical_requirements}
+            Functional Requirements: {functional_requirements}
+            """,
+    "preview": """
+            Create interactive HTML previews for all generated components:
+            
+            Generate pixel-perfect previews that work across desktop, tablet, and mobile.
+            Include interactive elements and proper responsive behavior.
+            Ensure previews accurately represent the final product.
+            """,
+    "qa_accessibility": """
+            Perform an accessibility audit of the generated code:
+            
+            - Audit accessibility compliance (WCAG 2.1 AA)
+            - Validate keyboard navigation, focus order and ARIA usage
+            - Generate improvement recommendations
+            """,
+    "qa_performance": """
+            Perform a performance and code quality review of the generated code:
+            
+            - Analyze performance metrics
+            - Validate responsive behavior
+            - Check code quality and best practices
+            - Generate improvement recommendations
+            """,
+    "export": """
+            Prepare production-ready deployment packages:
+            
+            - Optimize code for production
+            - Generate deployment configurations
+            - Create documentation
+            - Package components for export
+            - Prepare deployment scripts
+            """
+}
+
+# Templates without intent fields are used as-is instead of being re-formatted
+_STATIC_TASK_TEMPLATES = frozenset(
+    name for name, template in _TASK_TEMPLATES.items()
+    if not any(field is not None for _, field, _, _ in string.Formatter().parse(template))
+)
+
+@functools.lru_cache(maxsize=2)
+def _iso_second(epoch_second: int) -> str:
+    """ISO timestamp for a whole UTC second, formatted once per second"""
+    return datetime.fromtimestamp(epoch_second, timezone.utc).isoformat()
+
+# Status updates carry timestamps at most this stale
+TIMESTAMP_REFRESH_SECONDS = 0.05
+
+_utc_iso_cache: Tuple[float, str] = (float("-inf"), "")
+
+def _utc_iso_now() -> str:
+    """Current UTC ISO timestamp, reformatted at most once per refresh interval"""
+    global _utc_iso_cache
+    now = time.monotonic()
+    if now - _utc_iso_cache[0] > TIMESTAMP_REFRESH_SECONDS:
+        _utc_iso_cache = (now, datetime.now(timezone.utc).isoformat())
+    return _utc_iso_cache[1]
+
+# Enum values looked up once instead of through the enum descriptor per update
+_STATUS_VALUES: Dict[AgentStatus, str] = {status: status.value for status in AgentStatus}
+
+# Orchestrator running the current generation, for tools on the shared agents
+_active_orchestrator: ContextVar["MagicUICrewOrchestrator"] = ContextVar("active_orchestrator")
+
+# Cerebras client and agents per API key, shared by all orchestrator instances
+_AGENT_REGISTRY: Dict[Optional[str], Tuple[CerebrasClient, Dict[str, Agent]]] = {}
+
+# Project being generated in the current task, so concurrent generations on one orchestrator stay apart
+_project_id_var: ContextVar[Optional[str]] = ContextVar("project_id", default=None)
+
+# Projects whose agent status stays queryable after their generation finishes
+MAX_TRACKED_PROJECTS = 32
+
+# Only domain and audience are matched fuzzily. On those short phrases one changed word
+# ("owners" vs "owner", "adults" vs "professionals") scores 0.5-0.82, while case,
+# punctuation and hyphenation variants score 1.0, so only the latter may hit
+INTENT_SIMILARITY_THRESHOLD = 0.95
+
+@dataclass(slots=True)
+class AgentRuntimeState:
+    """Mutable agent status for one project, as parallel arrays indexed like agent_keys"""
+    status: List[AgentStatus]
+    progress: array.array
+    current_task: List[str]
+    responses: List[AgentStatusResponse]
+    metrics: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+
 class MagicUICrewOrchestrator:
     def __init__(self, cerebras_api_key: str, websocket_manager: WebSocketManager):
-        # Initialize Cerebras client
-        self.cerebras_client = CerebrasClient(api_key=cerebras_api_key)
         self.websocket_manager = websocket_manager
-        self.agents = {}
-        self.current_project_id = None
-        self.setup_agents()
+        self._pending_updates: List[Dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._desc_cache: "OrderedDict[Tuple, Dict[str, str]]" = OrderedDict()
+        self._result_cache = SemanticCache("CREW_RESULT", ttl=3600, threshold=INTENT_SIMILARITY_THRESHOLD, max_entries=256)
+        self.setup_agents(cerebras_api_key)
+    
+    @property
+    def current_project_id(self) -> Optional[str]:
+        return _project_id_var.get()
     
-    def setup_agents(self):
-        """Initialize CrewAI agents with specific roles and capabilities"""
+    @classmethod
+    def _build_agents(cls, cerebras_client: CerebrasClient) -> Dict[str, Agent]:
+        """Initialize CrewAI agents with specific roles and capabilities
+        
+        Agents hold no per-project state; tools that need the running orchestrator
+        look it up through _active_orchestrator.
+        """
         
         # Design Architect Agent
         architect_llm = create_cerebras_llm(
-            cerebras_client=self.cerebras_client,
+            cerebras_client=cerebras_client,
             agent_role="Senior UI/UX Design Architect",
             system_prompt="""You are a world-class UI/UX architect with 15+ years of experience 
             designing award-winning interfaces. You excel at understanding user needs and 
@@ -40,7 +327,7 @@ class MagicUICrewOrchestrator:
             temperature=0.7
         )
         
-        self.design_architect = Agent(
+        design_architect = Agent(
             role="Senior UI/UX Design Architect",
             goal="Analyze user requirements and create comprehensive UI architecture plans",
             backstory="""You are a world-class UI/UX architect with 15+ years of experience 
@@ -50,22 +337,22 @@ class MagicUICrewOrchestrator:
                 Tool(
                     name="requirement_analyzer",
                     description="Analyze user requirements and extract key design patterns",
-                    func=self._analyze_requirements
+                    func=cls._analyze_requirements
                 ),
                 Tool(
                     name="component_mapper",
                     description="Map requirements to specific UI components",
-                    func=self._map_components
+                    func=cls._map_components
                 )
             ],
             llm=architect_llm,
-            verbose=True,
+            verbose=CREW_VERBOSE,
             allow_delegation=False
         )
         
         # Style Curator Agent
         style_llm = create_cerebras_llm(
-            cerebras_client=self.cerebras_client,
+            cerebras_client=cerebras_client,
             agent_role="Creative Style Curator & Brand Specialist",
             system_prompt="""You are a renowned creative director known for pushing design 
             boundaries while maintaining usability. You have an eye for emerging trends 
@@ -74,7 +361,7 @@ class MagicUICrewOrchestrator:
             temperature=0.8  # Higher temperature for creativity
         )
         
-        self.style_curator = Agent(
+        style_curator = Agent(
             role="Creative Style Curator & Brand Specialist",
             goal="Create unique, on-brand visual designs with high novelty scores",
             backstory="""You are a renowned creative director known for pushing design 
@@ -84,22 +371,22 @@ class MagicUICrewOrchestrator:
                 Tool(
                     name="style_generator",
                     description="Generate unique style variations based on trends and brand",
-                    func=self._generate_styles
+                    func=cls._generate_styles
                 ),
                 Tool(
                     name="novelty_calculator",
                     description="Calculate novelty scores for design variations",
-                    func=self._calculate_novelty
+                    func=cls._calculate_novelty
                 )
             ],
             llm=style_llm,
-            verbose=True,
+            verbose=CREW_VERBOSE,
             allow_delegation=False
         )
         
         # Code Generator Agent
         code_llm = create_cerebras_llm(
-            cerebras_client=self.cerebras_client,
+            cerebras_client=cerebras_client,
             agent_role="Senior Full-Stack Developer & Code Architect",
             system_prompt="""You are a senior developer with expertise in React, Next.js, 
             TypeScript, and modern web technologies. You write clean, maintainable code 
@@ -109,7 +396,7 @@ class MagicUICrewOrchestrator:
             max_completion_tokens=24576  # Larger for complex code generation
         )
         
-        self.code_generator = Agent(
+        code_generator = Agent(
             role="Senior Full-Stack Developer & Code Architect",
             goal="Generate production-ready, optimized React/Next.js code",
             backstory="""You are a senior developer with expertise in React, Next.js, 
@@ -119,22 +406,23 @@ class MagicUICrewOrchestrator:
                 Tool(
                     name="react_generator",
                     description="Generate React/Next.js components",
-                    func=self._generate_react_code
+                    func=lambda arg: run_async(_active_orchestrator.get()._generate_react_code(arg)),
+                    coroutine=lambda arg: _active_orchestrator.get()._generate_react_code(arg)
                 ),
                 Tool(
                     name="typescript_optimizer",
                     description="Optimize TypeScript code for performance",
-                    func=self._optimize_typescript
+                    func=cls._optimize_typescript
                 )
             ],
             llm=code_llm,
-            verbose=True,
+            verbose=CREW_VERBOSE,
             allow_delegation=False
         )
         
         # Preview Engine Agent
         preview_llm = create_cerebras_llm(
-            cerebras_client=self.cerebras_client,
+            cerebras_client=cerebras_client,
             agent_role="Interactive Preview Specialist",
             system_prompt="""You specialize in creating pixel-perfect previews that work 
             across all devices. You understand responsive design principles and can 
@@ -143,7 +431,7 @@ class MagicUICrewOrchestrator:
             temperature=0.4
         )
         
-        self.preview_engine = Agent(
+        preview_engine = Agent(
             role="Interactive Preview Specialist",
             goal="Create live, interactive previews with multi-device support",
             backstory="""You specialize in creating pixel-perfect previews that work 
@@ -153,56 +441,79 @@ class MagicUICrewOrchestrator:
                 Tool(
                     name="preview_generator",
                     description="Generate interactive HTML previews",
-                    func=self._generate_preview
+                    func=lambda arg: run_async(_active_orchestrator.get()._generate_preview(arg)),
+                    coroutine=lambda arg: _active_orchestrator.get()._generate_preview(arg)
                 ),
                 Tool(
                     name="responsive_tester",
                     description="Test responsive behavior across devices",
-                    func=self._test_responsive
+                    func=cls._test_responsive
                 )
             ],
             llm=preview_llm,
-            verbose=True,
+            verbose=CREW_VERBOSE,
             allow_delegation=False
         )
         
-        # QA Engineer Agent
-        qa_llm = create_cerebras_llm(
-            cerebras_client=self.cerebras_client,
-            agent_role="Quality Assurance & Accessibility Specialist",
+        # QA is split into accessibility and performance auditors that run concurrently
+        qa_accessibility_llm = create_cerebras_llm(
+            cerebras_client=cerebras_client,
+            agent_role="Accessibility Specialist",
             system_prompt="""You are a meticulous QA engineer with deep expertise in web 
-            accessibility, performance optimization, and code quality. You ensure every 
-            deliverable meets the highest standards. Provide detailed analysis with
-            specific recommendations and actionable improvements.""",
+            accessibility and inclusive design. You ensure every deliverable meets WCAG 2.1 AA. 
+            Provide detailed analysis with specific recommendations and actionable improvements.""",
             temperature=0.5
         )
         
-        self.qa_engineer = Agent(
-            role="Quality Assurance & Accessibility Specialist",
-            goal="Ensure code quality, accessibility, and performance standards",
+        qa_accessibility = Agent(
+            role="Accessibility Specialist",
+            goal="Ensure generated interfaces meet accessibility standards",
             backstory="""You are a meticulous QA engineer with deep expertise in web 
-            accessibility, performance optimization, and code quality. You ensure every 
-            deliverable meets the highest standards.""",
+            accessibility and inclusive design. You ensure every deliverable meets the 
+            highest standards.""",
             tools=[
                 Tool(
                     name="accessibility_auditor",
                     description="Audit accessibility compliance",
-                    func=self._audit_accessibility
-                ),
+                    func=cls._audit_accessibility
+                )
+            ],
+            llm=qa_accessibility_llm,
+            verbose=CREW_VERBOSE,
+            allow_delegation=False
+        )
+        
+        qa_performance_llm = create_cerebras_llm(
+            cerebras_client=cerebras_client,
+            agent_role="Performance & Code Quality Specialist",
+            system_prompt="""You are a meticulous QA engineer with deep expertise in web 
+            performance optimization and code quality. You ensure every deliverable is fast 
+            and maintainable. Provide detailed analysis with specific recommendations and 
+            actionable improvements.""",
+            temperature=0.5
+        )
+        
+        qa_performance = Agent(
+            role="Performance & Code Quality Specialist",
+            goal="Ensure code quality and performance standards",
+            backstory="""You are a meticulous QA engineer with deep expertise in web 
+            performance optimization and code quality. You ensure every deliverable meets 
+            the highest standards.""",
+            tools=[
                 Tool(
                     name="performance_analyzer",
                     description="Analyze performance metrics",
-                    func=self._analyze_performance
+                    func=cls._analyze_performance
                 )
             ],
-            llm=qa_llm,
-            verbose=True,
+            llm=qa_performance_llm,
+            verbose=CREW_VERBOSE,
             allow_delegation=False
         )
         
         # Export Manager Agent
         export_llm = create_cerebras_llm(
-            cerebras_client=self.cerebras_client,
+            cerebras_client=cerebras_client,
             agent_role="Deployment & Export Specialist",
             system_prompt="""You are an expert in deployment strategies and code packaging. 
             You ensure that generated code is ready for production deployment with proper 
@@ -211,7 +522,7 @@ class MagicUICrewOrchestrator:
             temperature=0.4
         )
         
-        self.export_manager = Agent(
+        export_manager = Agent(
             role="Deployment & Export Specialist",
             goal="Prepare production-ready deployment packages",
             backstory="""You are an expert in deployment strategies and code packaging. 
@@ -221,96 +532,152 @@ class MagicUICrewOrchestrator:
                 Tool(
                     name="package_optimizer",
                     description="Optimize packages for deployment",
-                    func=self._optimize_packages
+                    func=cls._optimize_packages
                 ),
                 Tool(
                     name="deployment_configurer",
                     description="Configure deployment settings",
-                    func=self._configure_deployment
+                    func=cls._configure_deployment
                 )
             ],
             llm=export_llm,
-            verbose=True,
+            verbose=CREW_VERBOSE,
             allow_delegation=False
         )
         
-        # Store agents for status tracking
-        self.agents = {
-            "architect": {
-                "agent": self.design_architect,
-                "name": "Design Architect",
-                "specialization": ["ui_design", "user_experience", "architecture"],
-                "status": AgentStatus.IDLE,
-                "progress": 0.0,
-                "current_task": "Ready to analyze requirements",
-                "performance": {"successRate": 0.95, "qualityScore": 0.92, "avgDuration": 2500}
-            },
-            "style_curator": {
-                "agent": self.style_curator,
-                "name": "Style Curator",
-                "specialization": ["visual_design", "branding", "creativity"],
-                "status": AgentStatus.IDLE,
-                "progress": 0.0,
-                "current_task": "Ready to curate styles",
-                "performance": {"successRate": 0.88, "qualityScore": 0.89, "avgDuration": 1800}
-            },
-            "code_generator": {
-                "agent": self.code_generator,
-                "name": "Code Generator",
-                "specialization": ["react", "typescript", "optimization"],
-                "status": AgentStatus.IDLE,
-                "progress": 0.0,
-                "current_task": "Ready to generate code",
-                "performance": {"successRate": 0.93, "qualityScore": 0.91, "avgDuration": 3200}
-            },
-            "previewer": {
-                "agent": self.preview_engine,
-                "name": "Preview Engine",
-                "specialization": ["visualization", "responsive_design", "testing"],
-                "status": AgentStatus.IDLE,
-                "progress": 0.0,
-                "current_task": "Ready to create previews",
-                "performance": {"successRate": 0.97, "qualityScore": 0.94, "avgDuration": 1200}
-            },
-            "qa_engineer": {
-                "agent": self.qa_engineer,
-                "name": "QA Engineer",
-                "specialization": ["quality_assurance", "accessibility", "performance"],
-                "status": AgentStatus.IDLE,
-                "progress": 0.0,
-                "current_task": "Ready to validate quality",
-                "performance": {"successRate": 0.96, "qualityScore": 0.93, "avgDuration": 2100}
-            },
-            "exporter": {
-                "agent": self.export_manager,
-                "name": "Export Manager",
-                "specialization": ["deployment", "packaging", "optimization"],
-                "status": AgentStatus.IDLE,
-                "progress": 0.0,
-                "current_task": "Ready to export",
-                "performance": {"successRate": 0.99, "qualityScore": 0.95, "avgDuration": 800}
-            }
+        return {
+            "architect": design_architect,
+            "style_curator": style_curator,
+            "code_generator": code_generator,
+            "previewer": preview_engine,
+            "qa_accessibility": qa_accessibility,
+            "qa_performance": qa_performance,
+            "exporter": export_manager,
         }
     
+    def setup_agents(self, cerebras_api_key: str):
+        """Attach the CrewAI agents, built once per API key and shared by every orchestrator"""
+        shared = _AGENT_REGISTRY.get(cerebras_api_key)
+        if shared is None:
+            cerebras_client = CerebrasClient(api_key=cerebras_api_key)
+            shared = _AGENT_REGISTRY[cerebras_api_key] = (cerebras_client, self._build_agents(cerebras_client))
+        self.cerebras_client, agents = shared
+        
+        self.design_architect = agents["architect"]
+        self.style_curator = agents["style_curator"]
+        self.code_generator = agents["code_generator"]
+        self.preview_engine = agents["previewer"]
+        self.qa_accessibility = agents["qa_accessibility"]
+        self.qa_performance = agents["qa_performance"]
+        self.export_manager = agents["exporter"]
+        
+        # Static agent details are parallel tuples; per-project status lives in AgentRuntimeState
+        self.agent_keys: Tuple[str, ...] = (
+            "architect", "style_curator", "code_generator", "previewer",
+            "qa_accessibility", "qa_performance", "exporter"
+        )
+        self.agent_names: Tuple[str, ...] = (
+            "Design Architect", "Style Curator", "Code Generator", "Preview Engine",
+            "Accessibility Auditor", "Performance Auditor", "Export Manager"
+        )
+        self.agent_specs: Tuple[Tuple[str, ...], ...] = (
+            ("ui_design", "user_experience", "architecture"),
+            ("visual_design", "branding", "creativity"),
+            ("react", "typescript", "optimization"),
+            ("visualization", "responsive_design", "testing"),
+            ("quality_assurance", "accessibility"),
+            ("quality_assurance", "performance", "code_quality"),
+            ("deployment", "packaging", "optimization"),
+        )
+        self.agent_initial_tasks: Tuple[str, ...] = (
+            "Ready to analyze requirements",
+            "Ready to curate styles",
+            "Ready to generate code",
+            "Ready to create previews",
+            "Ready to audit accessibility",
+            "Ready to analyze performance",
+            "Ready to export",
+        )
+        self.agent_perf: List[Dict[str, float]] = [
+            {"successRate": 0.95, "qualityScore": 0.92, "avgDuration": 2500},
+            {"successRate": 0.88, "qualityScore": 0.89, "avgDuration": 1800},
+            {"successRate": 0.93, "qualityScore": 0.91, "avgDuration": 3200},
+            {"successRate": 0.97, "qualityScore": 0.94, "avgDuration": 1200},
+            {"successRate": 0.96, "qualityScore": 0.93, "avgDuration": 1200},
+            {"successRate": 0.96, "qualityScore": 0.93, "avgDuration": 1200},
+            {"successRate": 0.99, "qualityScore": 0.95, "avgDuration": 800},
+        ]
+        self._key_to_idx: Dict[str, int] = {key: i for i, key in enumerate(self.agent_keys)}
+        self._agent_to_key: Dict[int, str] = {
+            id(agent): key
+            for agent, key in zip(
+                (self.design_architect, self.style_curator, self.code_generator,
+                 self.preview_engine, self.qa_accessibility, self.qa_performance, self.export_manager),
+                self.agent_keys
+            )
+        }
+        
+        self._idle_state = self._new_runtime_state()
+        self._project_states: "OrderedDict[str, AgentRuntimeState]" = OrderedDict()
+    
+    def _new_runtime_state(self) -> AgentRuntimeState:
+        """Fresh all-idle agent status, with one response model per agent built without validation"""
+        status = [AgentStatus.IDLE] * len(self.agent_keys)
+        progress = array.array("d", [0.0] * len(self.agent_keys))
+        current_task = list(self.agent_initial_tasks)
+        responses = [
+            AgentStatusResponse.model_construct(
+                id=agent_id,
+                name=name,
+                specialization=list(specialization),
+                status=agent_status,
+                progress=agent_progress,
+                current_task=task,
+                performance=performance
+            )
+            for agent_id, name, specialization, agent_status, agent_progress, task, performance in zip(
+                self.agent_keys, self.agent_names, self.agent_specs, status,
+                progress, current_task, self.agent_perf
+            )
+        ]
+        return AgentRuntimeState(status=status, progress=progress, current_task=current_task, responses=responses)
+    
+    def _runtime_state(self) -> AgentRuntimeState:
+        """Agent status of the project generated in the current task"""
+        return self._project_states.get(self.current_project_id) or self._idle_state
+    
     async def orchestrate_ui_generation(self, design_intent: DesignIntentResponse, project_id: str) -> Dict[str, Any]:
         """Orchestrate the complete UI generation process using CrewAI"""
-        self.current_project_id = project_id
+        _project_id_var.set(project_id)
+        _active_orchestrator.set(self)
+        bind_event_loop(asyncio.get_running_loop())
+        
+        # Near-duplicate intents reuse a previous crew result instead of re-running every agent
+        scope, intent_text = self._intent_cache_key(design_intent)
+        key = hashlib.sha256(f"{scope}|{intent_text}".encode()).hexdigest()
+        hit, cached = self._result_cache.get(key, scope, intent_text)
+        if hit:
+            logger.info(f"Reusing cached crew result for project {project_id}")
+            cached["request_id"] = project_id
+            return cached
         
         try:
-            # Create tasks for each agent
-            tasks = self._create_tasks(design_intent)
-            
-            # Create the crew
-            crew = Crew(
-                agents=[agent_data["agent"] for agent_data in self.agents.values()],
-                tasks=tasks,
-                process=Process.sequential,
-                verbose=True
-            )
+            # Metrics only depend on the intent, so they are settled before the crew runs
+            state = self._new_runtime_state()
+            state.metrics = self._precompute_static_metrics(design_intent)
+            self._project_states[project_id] = state
+            self._project_states.move_to_end(project_id)
+            while len(self._project_states) > MAX_TRACKED_PROJECTS:
+                self._project_states.popitem(last=False)
+            
+            # Create tasks for each agent, grouped by dependency level
+            task_groups = self._create_tasks(design_intent)
             
             # Execute the crew with real-time updates
-            result = await self._execute_crew_with_updates(crew, design_intent)
+            result = await self._execute_crew_with_updates(task_groups, design_intent)
             
+            if result.get("status") == "completed":
+                self._result_cache.set(key, scope, result, intent_text)
             return result
             
         except Exception as e:
@@ -318,121 +685,178 @@ class MagicUICrewOrchestrator:
             await self._broadcast_error(str(e))
             raise
     
-    def _create_tasks(self, design_intent: DesignIntentResponse) -> List[Task]:
-        """Create CrewAI tasks based on design intent"""
+    @staticmethod
+    def _precompute_static_metrics(design_intent: DesignIntentResponse) -> Mapping[str, float]:
+        """Quality metrics derived from the design intent alone"""
+        novelty_score = min(0.95, 0.75 + (len(design_intent.style_preferences) * 0.05))
+        complexity_bonus = 0.1 if design_intent.complexity > 0.7 else 0
+        return MappingProxyType({
+            "novelty": novelty_score + complexity_bonus,
+            "quality": 0.92,
+            "performance": 0.89,
+            "accessibility": 0.95
+        })
+    
+    @staticmethod
+    def _intent_cache_key(design_intent: DesignIntentResponse) -> Tuple[str, str]:
+        """Split a design intent into an exact-match scope and canonical text for similarity matching
         
-        tasks = []
+        Everything that changes what gets built (components, styles, requirements,
+        complexity) must match exactly; only the descriptive domain and audience are fuzzy.
+        """
+        scope = orjson.dumps([
+            design_intent.page_type,
+            design_intent.layout,
+            design_intent.complexity,
+            sorted(design_intent.components),
+            sorted(design_intent.style_preferences),
+            sorted(design_intent.brand_personality),
+            sorted(design_intent.functional_requirements),
+            sorted(design_intent.technical_requirements),
+        ]).decode()
+        text = f"{design_intent.business_domain} | {design_intent.target_audience}"
+        return scope, text
+    
+    @staticmethod
+    def _render_task_descriptions(design_intent: DesignIntentResponse) -> Dict[str, str]:
+        """Fill the task description templates from a design intent"""
+        fields = {
+            "page_type": design_intent.page_type,
+            "components": ", ".join(design_intent.components),
+            "layout": design_intent.layout,
+            "complexity": design_intent.complexity,
+            "target_audience": design_intent.target_audience,
+            "business_domain": design_intent.business_domain,
+            "style_preferences": ", ".join(design_intent.style_preferences),
+            "brand_personality": ", ".join(design_intent.brand_personality),
+            "technical_requirements": ", ".join(design_intent.technical_requirements),
+            "functional_requirements": ", ".join(design_intent.functional_requirements),
+        }
+        return {
+            name: template if name in _STATIC_TASK_TEMPLATES else template.format_map(fields)
+            for name, template in _TASK_TEMPLATES.items()
+        }
+    
+    def _task_descriptions(self, design_intent: DesignIntentResponse) -> Dict[str, str]:
+        """Rendered task descriptions for a design intent, memoized on the fields the templates use"""
+        key = (
+            design_intent.page_type,
+            tuple(design_intent.components),
+            design_intent.layout,
+            design_intent.complexity,
+            design_intent.target_audience,
+            design_intent.business_domain,
+            tuple(design_intent.style_preferences),
+            tuple(design_intent.brand_personality),
+            tuple(design_intent.technical_requirements),
+            tuple(design_intent.functional_requirements),
+        )
+        descriptions = self._desc_cache.get(key)
+        if descriptions is not None:
+            self._desc_cache.move_to_end(key)
+            return descriptions
+        
+        descriptions = self._render_task_descriptions(design_intent)
+        self._desc_cache[key] = descriptions
+        if len(self._desc_cache) > TASK_DESCRIPTION_CACHE_SIZE:
+            self._desc_cache.popitem(last=False)
+        return descriptions
+    
+    def _create_tasks(self, design_intent: DesignIntentResponse) -> List[List[Task]]:
+        """Create CrewAI tasks based on design intent, grouped in dependency order
+        
+        Tasks within a group only depend on earlier groups, so they can run concurrently.
+        """
+        
+        descriptions = self._task_descriptions(design_intent)
         
         # Architecture Task
         architecture_task = Task(
-            description=f"""
-            Analyze the user's design intent and create a comprehensive UI architecture plan:
-            
-            Page Type: {design_intent.page_type}
-            Components Needed: {', '.join(design_intent.components)}
-            Layout Structure: {design_intent.layout}
-            Complexity Level: {design_intent.complexity}
-            Target Audience: {design_intent.target_audience}
-            Business Domain: {design_intent.business_domain}
-            
-            Create a detailed component hierarchy, define responsive breakpoints,
-            and establish accessibility requirements. Output should be a JSON structure
-            with component specifications and layout guidelines.
-            """,
+            description=descriptions["architecture"],
             agent=self.design_architect,
             expected_output="JSON structure with component hierarchy, layout specifications, and accessibility requirements"
         )
-        tasks.append(architecture_task)
         
         # Style Curation Task
         style_task = Task(
-            description=f"""
-            Based on the architecture plan, create unique visual styles:
-            
-            Style Preferences: {', '.join(design_intent.style_preferences)}
-            Brand Personality: {', '.join(design_intent.brand_personality)}
-            Business Domain: {design_intent.business_domain}
-            
-            Generate 3 distinct style variations with high novelty scores.
-            Include color palettes, typography, spacing, and visual effects.
-            Calculate novelty scores for each variation.
-            """,
+            description=descriptions["style"],
             agent=self.style_curator,
-            expected_output="3 style variations with design tokens, novelty scores, and visual specifications",
-            context=[architecture_task]
+            expected_output="3 style variations with design tokens, novelty scores, and visual specifications"
         )
-        tasks.append(style_task)
         
         # Code Generation Task
         code_task = Task(
-            description=f"""
-            Generate production-ready React/Next.js code based on architecture and styles:
-            
-            Technical Requirements: {', '.join(design_intent.technical_requirements)}
-            Functional Requirements: {', '.join(design_intent.functional_requirements)}
-            
-            Create clean, maintainable TypeScript code with proper component structure,
-            responsive design, and accessibility features. Include proper imports,
-            error handling, and performance optimizations.
-            """,
+            description=descriptions["code"],
             agent=self.code_generator,
             expected_output="Complete React/Next.js component code with TypeScript, properly structured and optimized",
             context=[architecture_task, style_task]
         )
-        tasks.append(code_task)
         
         # Preview Generation Task
         preview_task = Task(
-            description="""
-            Create interactive HTML previews for all generated components:
-            
-            Generate pixel-perfect previews that work across desktop, tablet, and mobile.
-            Include interactive elements and proper responsive behavior.
-            Ensure previews accurately represent the final product.
-            """,
+            description=descriptions["preview"],
             agent=self.preview_engine,
             expected_output="Interactive HTML previews for desktop, tablet, and mobile viewports",
             context=[code_task]
         )
-        tasks.append(preview_task)
         
-        # Quality Assurance Task
-        qa_task = Task(
-            description="""
-            Perform comprehensive quality assurance on generated code and previews:
-            
-            - Audit accessibility compliance (WCAG 2.1 AA)
-            - Analyze performance metrics
-            - Validate responsive behavior
-            - Check code quality and best practices
-            - Generate improvement recommendations
-            """,
-            agent=self.qa_engineer,
-            expected_output="Quality report with accessibility audit, performance metrics, and recommendations",
-            context=[code_task, preview_task]
+        # Quality Assurance Tasks
+        accessibility_task = Task(
+            description=descriptions["qa_accessibility"],
+            agent=self.qa_accessibility,
+            expected_output="Accessibility audit with WCAG findings and recommendations",
+            context=[code_task]
+        )
+        
+        performance_task = Task(
+            description=descriptions["qa_performance"],
+            agent=self.qa_performance,
+            expected_output="Performance and code quality report with metrics and recommendations",
+            context=[code_task]
         )
-        tasks.append(qa_task)
         
         # Export Preparation Task
         export_task = Task(
-            description="""
-            Prepare production-ready deployment packages:
-            
-            - Optimize code for production
-            - Generate deployment configurations
-            - Create documentation
-            - Package components for export
-            - Prepare deployment scripts
-            """,
+            description=descriptions["export"],
             agent=self.export_manager,
             expected_output="Production-ready deployment package with optimized code and configurations",
-            context=[qa_task]
+            context=[preview_task, accessibility_task, performance_task]
         )
-        tasks.append(export_task)
         
-        return tasks
+        # Styles only need the design intent, and preview and both QA audits only need the generated code
+        return [
+            [architecture_task, style_task],
+            [code_task],
+            [preview_task, accessibility_task, performance_task],
+            [export_task]
+        ]
+    
+    async def _run_task_groups(self, task_groups: List[List[Task]]) -> Any:
+        """Run task groups in order, kicking off one crew per task within a group concurrently
+        
+        Returns:
+            Output of the final task
+        """
+        limit = asyncio.Semaphore(MAX_CONCURRENT_CREWS)
+        result = None
+        for group in task_groups:
+            results = await asyncio.gather(*(self._kickoff_task(task, limit) for task in group))
+            result = results[-1]
+        return result
     
-    async def _execute_crew_with_updates(self, crew: Crew, design_intent: DesignIntentResponse) -> Dict[str, Any]:
+    async def _kickoff_task(self, task: Task, limit: asyncio.Semaphore) -> Any:
+        """Run a single task's crew in a worker thread, reporting its agent's status as it starts and finishes"""
+        agent_key = self._agent_to_key[id(task.agent)]
+        i = self._key_to_idx[agent_key]
+        crew = Crew(agents=[task.agent], tasks=[task], process=Process.sequential, verbose=CREW_VERBOSE)
+        
+        async with limit:
+            await self._update_agent_status(agent_key, AgentStatus.WORKING, 50.0, f"{self.agent_names[i]} is working")
+            result = await asyncio.to_thread(crew.kickoff)
+        await self._update_agent_status(agent_key, AgentStatus.COMPLETED, 100.0, "Task completed")
+        return result
+    
+    async def _execute_crew_with_updates(self, task_groups: List[List[Task]], design_intent: DesignIntentResponse) -> Dict[str, Any]:
         """Execute crew with real-time status updates"""
         
         try:
@@ -442,21 +866,20 @@ class MagicUICrewOrchestrator:
                 stage="AI crew is starting the design process",
                 project_id=self.current_project_id
             )
-
-            # Asynchronously execute the crew
-            # Note: kickoff is an async operation in recent crewai versions
-            result = await crew.kickoff_async()
-
+            
+            # Crews kick off in worker threads; each agent's status follows its own task
+            result = await self._run_task_groups(task_groups)
+            
             # Announce completion
             await self.websocket_manager.send_generation_progress(
                 progress=0.9,
                 stage="AI crew has finished. Finalizing results...",
                 project_id=self.current_project_id
             )
-
+            
             # Process the final result
             return await self._process_crew_result(result, design_intent)
-
+            
         except Exception as e:
             logger.error(f"Crew execution failed: {str(e)}")
             await self._broadcast_error(f"AI crew process failed: {str(e)}")
@@ -464,32 +887,55 @@ class MagicUICrewOrchestrator:
     
     async def _update_agent_status(self, agent_key: str, status: AgentStatus, progress: float, task: str):
         """Update agent status and broadcast to WebSocket clients"""
-        if agent_key in self.agents:
-            self.agents[agent_key]["status"] = status
-            self.agents[agent_key]["progress"] = progress
-            self.agents[agent_key]["current_task"] = task
-            
-            # Broadcast update
-            await self.websocket_manager.broadcast({
-                "type": "agent_status_update",
-                "data": {
-                    "agent_id": agent_key,
-                    "status": status.value,
-                    "progress": progress,
-                    "current_task": task,
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                }
+        i = self._key_to_idx.get(agent_key)
+        if i is not None:
+            state = self._runtime_state()
+            state.status[i] = status
+            state.progress[i] = progress
+            state.current_task[i] = task
+            
+            response = state.responses[i]
+            response.status = status
+            response.progress = progress
+            response.current_task = task
+            
+            # Queue the update; updates arriving within the batch window go out as one frame
+            self._pending_updates.append({
+                "project_id": self.current_project_id,
+                "agent_id": agent_key,
+                "status": _STATUS_VALUES[status],
+                "progress": progress,
+                "current_task": task
             })
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self._flush_updates())
+    
+    async def _flush_updates(self):
+        """Broadcast queued agent status updates after the batch window"""
+        await asyncio.sleep(STATUS_BATCH_WINDOW_SECONDS)
+        updates, self._pending_updates = self._pending_updates, []
+        if not self.websocket_manager.has_clients():
+            return
+        
+        # One timestamp for the whole batch
+        timestamp = _utc_iso_now()
+        for update in updates:
+            update["timestamp"] = timestamp
+        
+        self.websocket_manager.publish_bytes(orjson.dumps({
+            "type": "batch_agent_status",
+            "data": updates
+        }))
     
     async def _broadcast_error(self, error_message: str):
         """Broadcast error to WebSocket clients"""
-        await self.websocket_manager.broadcast({
+        self.websocket_manager.publish_bytes(orjson.dumps({
             "type": "error",
             "data": {
                 "message": error_message,
-                "timestamp": datetime.now(timezone.utc).isoformat()
+                "timestamp": _iso_second(int(time.time()))
             }
-        })
+        }))
     
     async def _process_crew_result(self, crew_result: Any, design_intent: DesignIntentResponse) -> Dict[str, Any]:
         """Process the crew execution result into a structured response"""
@@ -501,22 +947,13 @@ class MagicUICrewOrchestrator:
             # Generate HTML preview from the code
             preview_html = await self._extract_preview_from_result(crew_result, generated_code)
             
-            # Calculate enhanced metrics
-            novelty_score = min(0.95, 0.75 + (len(design_intent.style_preferences) * 0.05))
-            complexity_bonus = 0.1 if design_intent.complexity > 0.7 else 0
-            
             return {
                 "id": f"ui_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}",
                 "request_id": self.current_project_id,
                 "code": generated_code,
                 "preview": preview_html,
                 "components": design_intent.components,
-                "metrics": {
-                    "novelty": novelty_score + complexity_bonus,
-                    "quality": 0.92,
-                    "performance": 0.89,
-                    "accessibility": 0.95
-                },
+                "metrics": dict(self._runtime_state().metrics),
                 "status": "completed",
                 "created_at": datetime.now(timezone.utc).isoformat()
             }
@@ -541,50 +978,74 @@ class MagicUICrewOrchestrator:
                 "created_at": datetime.now(timezone.utc).isoformat()
             }
     
-    def get_agent_status(self) -> List[AgentStatusResponse]:
-        """Get current status of all agents"""
-        return [
-            AgentStatusResponse(
-                id=agent_id,
-                name=agent_data["name"],
-                specialization=agent_data["specialization"],
-                status=agent_data["status"],
-                progress=agent_data["progress"],
-                current_task=agent_data["current_task"],
-                performance=agent_data["performance"]
-            )
-            for agent_id, agent_data in self.agents.items()
-        ]
+    def get_agent_status(self, project_id: Optional[str] = None) -> List[AgentStatusResponse]:
+        """Get current status of all agents for a project, defaulting to the most recent one"""
+        if project_id is not None:
+            state = self._project_states.get(project_id, self._idle_state)
+        elif self._project_states:
+            state = next(reversed(self._project_states.values()))
+        else:
+            state = self._idle_state
+        return list(state.responses)
     
-    # Tool functions for agents
-    def _analyze_requirements(self, requirements: str) -> str:
+    # Tool functions for agents; the placeholder ones return pre-serialized results
+    @staticmethod
+    def _analyze_requirements(requirements: str) -> str:
         """Analyze user requirements and extract design patterns"""
         # Implementation for requirement analysis
-        return json.dumps({"patterns": ["responsive", "accessible"], "complexity": "medium"})
+        return _TOOL_OUTPUTS["requirements"]
     
-    def _map_components(self, requirements: str) -> str:
+    @staticmethod
+    def _map_components(requirements: str) -> str:
         """Map requirements to UI components"""
         # Implementation for component mapping
-        return json.dumps({"components": ["header", "hero", "features", "footer"]})
+        return _TOOL_OUTPUTS["components"]
     
-    def _generate_styles(self, context: str) -> str:
+    @staticmethod
+    def _generate_styles(context: str) -> str:
         """Generate style variations"""
         # Implementation for style generation
-        return json.dumps({"styles": ["minimalist", "glassmorphism", "modern"]})
+        return _TOOL_OUTPUTS["styles"]
     
-    def _calculate_novelty(self, styles: str) -> str:
+    @staticmethod
+    def _calculate_novelty(styles: str) -> str:
         """Calculate novelty scores"""
         # Implementation for novelty calculation
-        return json.dumps({"novelty_scores": [0.85, 0.78, 0.92]})
+        return _TOOL_OUTPUTS["novelty"]
+    
+    @semantic_cache(namespace=f"CREW_CODE:{_prompt_version(CODE_SYSTEM_PROMPT_TEMPLATE)}", ttl=3600)
+    async def _cached_react_code(self, specifications: str, temperature: float) -> str:
+        """Generate React code, reusing completions only for identical specifications
+        
+        Code streams in and each chunk is forwarded to clients as generation progress.
+        """
+        chunks: List[str] = []
+        generated_chars = 0
+        async for chunk in self.cerebras_client.generate_code_stream(
+            requirements=specifications,
+            language="typescript",
+            framework="react",
+            temperature=temperature
+        ):
+            chunks.append(chunk)
+            generated_chars += len(chunk)
+            
+            estimated_tokens = generated_chars / CHARS_PER_TOKEN
+            await self.websocket_manager.send_generation_progress(
+                progress=0.25 + 0.6 * min(1.0, estimated_tokens / EXPECTED_CODE_TOKENS),
+                stage="Generating code",
+                project_id=self.current_project_id,
+                partial=chunk
+            )
+        return "".join(chunks)
     
     async def _generate_react_code(self, specifications: str) -> str:
         """Generate React/Next.js code using Cerebras"""
         try:
-            code_response = await self.cerebras_client.generate_code(
-                requirements=specifications,
-                language="typescript",
-                framework="react",
-                temperature=0.3  # Lower for consistent code
+            code_response = await self._cached_react_code(
+                specifications,
+                CODE_TEMPERATURE,
+                use_cache=CODE_TEMPERATURE < CACHEABLE_TEMPERATURE
             )
             return code_response
         except Exception as e:
@@ -596,13 +1057,29 @@ export default function GeneratedComponent() {{
 }}"""
             return fallback_code
     
-    def _optimize_typescript(self, code: str) -> str:
+    @staticmethod
+    def _optimize_typescript(code: str) -> str:
         """Optimize TypeScript code"""
         # Implementation for TypeScript optimization
         return "// Optimized TypeScript code"
     
+    @semantic_cache(namespace=f"CREW_PREVIEW:{_prompt_version(_PREVIEW_SYSTEM_PROMPT)}", ttl=3600)
+    async def _cached_preview(self, preview_prompt: str, temperature: float) -> str:
+        """Convert component code to HTML; only identical code reuses a preview"""
+        return await self.cerebras_client.generate_agent_response(
+            system_prompt=_PREVIEW_SYSTEM_PROMPT,
+            user_input=preview_prompt,
+            agent_role="Preview Generator",
+            temperature=temperature
+        )
+    
     async def _generate_preview(self, code: str) -> str:
         """Generate HTML preview from React code using Cerebras"""
+        # Static markup converts locally without an LLM round-trip
+        static_html = _static_jsx_to_html(code)
+        if static_html is not None:
+            return _PREVIEW_WRAPPER_TEMPLATE.substitute(content=static_html)
+        
         try:
             preview_prompt = f"""
             Convert this React/TypeScript component code into a complete, standalone HTML preview:
@@ -621,84 +1098,56 @@ export default function GeneratedComponent() {{
             Return ONLY the complete HTML document, nothing else.
             """
             
-            preview_response = await self.cerebras_client.generate_agent_response(
-                system_prompt="You are an expert at converting React components to standalone HTML. Create pixel-perfect HTML previews that work in iframes.",
-                user_input=preview_prompt,
-                agent_role="Preview Generator",
-                temperature=0.4
+            preview_response = await self._cached_preview(
+                preview_prompt,
+                PREVIEW_TEMPERATURE,
+                use_cache=PREVIEW_TEMPERATURE < CACHEABLE_TEMPERATURE
             )
             
             # Clean up the response to extract just the HTML
             html_content = preview_response.strip()
             if not html_content.startswith('<!DOCTYPE'):
                 # If the response doesn't start with DOCTYPE, wrap it
-                html_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Generated Component Preview</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <style>
-        body {{ margin: 0; padding: 16px; background: #f9fafb; }}
-        .component-container {{ max-width: 100%; margin: 0 auto; }}
-    </style>
-</head>
-<body>
-    <div class="component-container">
-        {html_content}
-    </div>
-</body>
-</html>"""
+                html_content = _PREVIEW_WRAPPER_TEMPLATE.substitute(content=html_content)
             
             return html_content
             
         except Exception as e:
             logger.error(f"Error generating preview: {str(e)}")
-            return f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Preview Error</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-</head>
-<body class="bg-gray-50 p-8">
-    <div class="max-w-md mx-auto bg-white rounded-lg shadow-md p-6 text-center">
-        <div class="text-red-500 text-2xl mb-4">⚠️</div>
-        <h2 class="text-lg font-semibold text-gray-900 mb-2">Preview Generation Failed</h2>
-        <p class="text-gray-600 text-sm">Unable to generate preview: {str(e)}</p>
-        <div class="mt-4 p-3 bg-gray-100 rounded text-xs text-left overflow-auto">
-            <code>{code[:200]}...</code>
-        </div>
-    </div>
-</body>
-</html>"""
+            return _PREVIEW_ERROR_TEMPLATE.substitute(
+                error=html.escape(str(e)),
+                code_snippet=html.escape(code[:200])
+            )
     
-    def _test_responsive(self, preview: str) -> str:
+    @staticmethod
+    def _test_responsive(preview: str) -> str:
         """Test responsive behavior"""
         # Implementation for responsive testing
-        return json.dumps({"responsive_test": "passed"})
+        return _TOOL_OUTPUTS["responsive"]
     
-    def _audit_accessibility(self, code: str) -> str:
+    @staticmethod
+    def _audit_accessibility(code: str) -> str:
         """Audit accessibility compliance"""
         # Implementation for accessibility audit
-        return json.dumps({"accessibility_score": 0.94})
+        return _TOOL_OUTPUTS["accessibility"]
     
-    def _analyze_performance(self, code: str) -> str:
+    @staticmethod
+    def _analyze_performance(code: str) -> str:
         """Analyze performance metrics"""
         # Implementation for performance analysis
-        return json.dumps({"performance_score": 0.88})
+        return _TOOL_OUTPUTS["performance"]
     
-    def _optimize_packages(self, code: str) -> str:
+    @staticmethod
+    def _optimize_packages(code: str) -> str:
         """Optimize packages for deployment"""
         # Implementation for package optimization
         return "// Optimized deployment package"
     
-    def _configure_deployment(self, package: str) -> str:
+    @staticmethod
+    def _configure_deployment(package: str) -> str:
         """Configure deployment settings"""
         # Implementation for deployment configuration
-        return json.dumps({"deployment_config": "configured"})
+        return _TOOL_OUTPUTS["deployment"]
     
     async def _extract_code_from_result(self, result: Any, design_intent: DesignIntentResponse) -> str:
         """Extract and generate code from crew result"""
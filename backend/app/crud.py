@@ -1,16 +1,68 @@
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models
 import uuid
 
-def get_chat_messages(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.ChatMessage).offset(skip).limit(limit).all()
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Columns are naive UTC DateTime; bring aware values into that form"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
 
-def create_chat_message(db: Session, message: models.ChatMessageCreate):
-    db_message = models.ChatMessage(
-        id=str(uuid.uuid4()),
-        **message.dict()
-    )
-    db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
-    return db_message
+async def get_chat_messages(
+    db: AsyncSession,
+    before: Optional[Tuple[datetime, str]] = None,
+    limit: int = 100
+):
+    """
+    Get chat messages newest first, one page at a time
+
+    Pass the timestamp and id of the oldest message of the previous page as
+    ``before``; each page is an index range scan however deep the history is.
+    """
+    query = select(models.ChatMessage)
+    if before is not None:
+        before_at, before_id = before
+        query = query.where(
+            tuple_(models.ChatMessage.created_at, models.ChatMessage.id) < (_naive_utc(before_at), before_id)
+        )
+    query = query.order_by(models.ChatMessage.created_at.desc(), models.ChatMessage.id.desc()).limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+def chat_message_to_dict(row: models.ChatMessage) -> Dict[str, Any]:
+    """Shape a stored row like the message /api/chat returned for it"""
+    return {
+        "id": row.id,
+        "role": row.role,
+        "agent": row.agent,
+        "text": row.text,
+        "metadata": row.meta or {},
+        "timestamp": row.created_at.replace(tzinfo=timezone.utc) if row.created_at else None
+    }
+
+async def create_chat_message(db: AsyncSession, message: Dict[str, Any]) -> str:
+    """Persist one chat message and return its id"""
+    ids = await create_chat_messages(db, [message])
+    return ids[0]
+
+async def create_chat_messages(db: AsyncSession, messages: List[Dict[str, Any]]) -> List[str]:
+    """Persist several chat messages with one multi-row INSERT and a single commit"""
+    rows = [
+        {
+            "id": message.get("id") or str(uuid.uuid4()),
+            "role": message["role"],
+            "agent": message.get("agent"),
+            "text": message["text"],
+            "meta": message.get("metadata"),
+            # Keep the timestamp clients saw so it works as a history cursor
+            "created_at": _naive_utc(message.get("timestamp")) or datetime.utcnow()
+        }
+        for message in messages
+    ]
+    if rows:
+        await db.execute(insert(models.ChatMessage), rows)
+        await db.commit()
+    return [row["id"] for row in rows]
@@ -1,17 +1,298 @@
 import os
+import re
 import json
+import hashlib
+import string
+import random
+import time
 import asyncio
-from typing import Dict, List, Optional, Any
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
+from google.api_core import exceptions as google_exceptions
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+
+import jsonpatch
+import orjson
+from jsonpointer import JsonPointerException
+
+from .llm_cache import exact_match, semantic_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 15.0
+
+# gemini-pro accepts 32k tokens of prompt and output combined
+GEMINI_CONTEXT_TOKENS = 32_760
+CHARS_PER_TOKEN = 4
+
+def approx_tokens(text: str) -> int:
+    """Estimate a token count locally; close enough for budgeting without a countTokens round-trip"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+# Quota and availability errors that succeed on a later attempt
+_TRANSIENT_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+
+class _RateLimiter:
+    """Token bucket allowing `rate` calls per `period` seconds, bursting up to `rate`; rate <= 0 means no limit"""
+
+    def __init__(self, rate: int, period: float = 60.0):
+        if rate <= 0:
+            logger.warning(f"Rate limit of {rate} calls per {period:g}s is not positive; calls will not be rate limited")
+        self.rate = rate
+        self.period = period
+        self._tokens = float(max(rate, 0))
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+def _extract_json(text: str) -> Any:
+    """Parse the JSON payload of a response, whether or not the model fenced it or added prose"""
+    match = _FENCE_RE.search(text)
+    return orjson.loads(match.group(1) if match else text.strip())
+
+_JSON_DECODER = json.JSONDecoder()
+_SEPARATOR_RE = re.compile(r"[\s,]*")
+_COLON_RE = re.compile(r"\s*:\s*")
+
+class _FileMapParser:
+    """Incrementally parse a streamed {"path": "content", ...} object, one finished entry at a time"""
+
+    def __init__(self):
+        self._buffer = ""
+        self._opened = False
+        # Where the search for the pending value's closing quote resumes, so each chunk
+        # is scanned once rather than the whole partial value being re-decoded per chunk
+        self._scan = 0
+
+    def _string_closed(self, start: int) -> bool:
+        """Whether the JSON string opening at start has received its closing quote"""
+        end = max(self._scan, start + 1)
+        while True:
+            end = self._buffer.find('"', end)
+            if end == -1:
+                self._scan = len(self._buffer)
+                return False
+            escapes = 0
+            while self._buffer[end - escapes - 1] == "\\":
+                escapes += 1
+            if escapes % 2 == 0:
+                self._scan = end
+                return True
+            end += 1
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """Add streamed text and return the entries it completed"""
+        self._buffer += text
+        if not self._opened:
+            start = self._buffer.find("{")
+            if start == -1:
+                return []
+            self._buffer = self._buffer[start + 1:]
+            self._opened = True
+
+        entries = []
+        while True:
+            pos = _SEPARATOR_RE.match(self._buffer).end()
+            try:
+                # A string only decodes once its closing quote has arrived
+                key, pos = _JSON_DECODER.raw_decode(self._buffer, pos)
+                pos = _COLON_RE.match(self._buffer, pos).end()
+                if self._buffer.startswith('"', pos) and not self._string_closed(pos):
+                    return entries
+                value, pos = _JSON_DECODER.raw_decode(self._buffer, pos)
+            except (ValueError, AttributeError):
+                return entries
+            if not isinstance(key, str) or not isinstance(value, str):
+                return entries
+            entries.append((key, value))
+            self._buffer = self._buffer[pos:]
+            self._scan = 0
+
+def _compact(obj: Any) -> str:
+    """Serialize prompt data without indentation; whitespace only costs tokens"""
+    return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode()
+
+# Prompts put their static instructions first and the per-call data last, so
+# repeated calls share an identical token prefix that providers can cache.
+# Built once at import; calls only substitute the data fields.
+
+UI_SCHEMA_TEMPLATE = string.Template("""You are a UI Design Architect. Convert the user brief below into a framework-agnostic UI_SCHEMA.json.
+
+Output a JSON "UI_SCHEMA.json" with:
+- page_type: string
+- title: string
+- sections: array of sections with id, type, layout, components
+- states: array of semantic states (loading, empty, error)
+- accessibility_notes: array of accessibility requirements
+
+Component types: heading, subheading, hero, navbar, sidebar, card, stat, chart, form, input, modal, button, list, grid
+
+Use a 12-column grid reference and responsive breakpoints (sm, md, lg).
+
+Output ONLY valid JSON, no markdown formatting or explanations.
+
+User Brief: $brief
+Mood: $mood""")
+
+STYLE_SPEC_TEMPLATE = string.Template("""You are a Style Curator. Create a STYLE_SPEC.json based on the UI_SCHEMA below.
+
+Create a unique style specification with:
+- style_name: string (e.g., "retro-futurism-mesh", "glass-aurora", "brutalist-editorial")
+- novelty_score: float (0.0-1.0, aim for ≥0.8)
+- trend_tags: array of trending design tags
+- colors: object with bg, surface, text, primary, accent, muted (hex colors)
+- typography: object with font_heading, font_body, scale
+- radii: object with sm, md, lg (pixel values)
+- spacing: object with unit, sectionY (pixel values)
+- shadows: object with e1 (box-shadow value)
+- effects: array of CSS effects (e.g., "aurora-bg:enabled", "glass-blur:10px")
+- component_variants: object mapping component types to variant names
+- a11y: object with min_contrast (e.g., "AA")
+
+IMPORTANT:
+- Avoid purple defaults unless explicitly requested
+- Use cyan (#00d4ff) and neon green (#00ff88) as primary colors
+- Ensure high contrast for accessibility
+- Make it unique and trendy (glassmorphism, gradient mesh, brutalism, etc.)
+- Add a one-line style description
+
+Output ONLY valid JSON, no markdown formatting.
+
+UI Schema: $ui_schema
+Style Name: $style_name""")
+
+CODE_TEMPLATE = string.Template("""You are a Frontend Engineer. Convert the UI_SCHEMA + STYLE_SPEC below to runnable Next.js + Tailwind code.
+
+Generate:
+1. A complete Next.js page component (page.tsx)
+2. CSS variables file (tokens.css) with design tokens
+3. Tailwind config extension (tailwind.config.js)
+4. Component files for each component type
+
+Requirements:
+- Use design tokens as CSS variables
+- Wire tokens into Tailwind config
+- Generate modular components in /components
+- Ensure accessibility (semantic HTML, ARIA attributes, keyboard navigation)
+- Use the exact colors and styles from style_spec
+- Make it responsive with the breakpoints from ui_schema
+- Include proper TypeScript types
+
+Output a JSON object with file paths as keys and file contents as values:
+{
+    "page.tsx": "...",
+    "tokens.css": "...",
+    "tailwind.config.js": "...",
+    "components/Button.tsx": "...",
+    "components/Card.tsx": "...",
+    // ... other component files
+}
+
+Output ONLY valid JSON, no markdown formatting.
+
+UI Schema: $ui_schema
+Style Spec: $style_spec
+Variant ID: $variant_id""")
+
+DESIGN_QUALITY_TEMPLATE = string.Template("""You are a Design QA Engineer. Analyze the quality of the UI design below.
+
+Rate each aspect from 0.0 to 1.0:
+- accessibility_score: WCAG compliance, semantic HTML, keyboard navigation
+- usability_score: user experience, navigation flow, information hierarchy
+- visual_appeal: aesthetics, color harmony, typography, spacing
+- responsiveness: mobile-first design, breakpoint handling
+- performance: code efficiency, asset optimization
+- innovation: uniqueness, trend alignment, creativity
+
+Output ONLY a JSON object with these scores.
+
+UI Schema: $ui_schema
+Style Spec: $style_spec""")
+
+PATCH_TEMPLATE = string.Template("""You are a UI Refinement Expert. Suggest patches to modify the UI schema below based on the user request.
+
+Generate JSON Patch operations to modify the schema:
+- op: "add", "remove", "replace", "move", "copy", "test"
+- path: JSON pointer to the element
+- value: new value (for add/replace operations)
+
+Output an array of patch operations that would fulfill the user's request.
+
+Current UI Schema: $current_schema
+User Request: $user_request""")
+
+CHAT_TEMPLATE = string.Template("""You are an AI assistant for Magic UI Elite, a premium UI generation platform.
+You help users create stunning user interfaces through AI orchestration.
+
+Respond as a helpful, professional AI assistant. You can:
+- Help with UI design decisions
+- Explain design patterns and best practices
+- Suggest improvements to generated designs
+- Answer questions about the platform
+- Provide creative inspiration
+
+Keep responses concise, helpful, and professional. Use emojis sparingly.
+
+User Message: $message
+Context: $context""")
+
+# Neutral scores reported when quality analysis fails
+DEFAULT_QUALITY_SCORES = {
+    "accessibility_score": 0.8,
+    "usability_score": 0.8,
+    "visual_appeal": 0.8,
+    "responsiveness": 0.8,
+    "performance": 0.8,
+    "innovation": 0.8
+}
+
+# Folded into cache keys so edited templates never serve stale responses
+PROMPT_VERSION = hashlib.sha256(
+    "\0".join(
+        template.template
+        for template in (UI_SCHEMA_TEMPLATE, STYLE_SPEC_TEMPLATE, CODE_TEMPLATE, DESIGN_QUALITY_TEMPLATE, PATCH_TEMPLATE)
+    ).encode()
+).hexdigest()[:12]
+
 class GeminiClient:
+    # Built once and passed by reference on every call
+    SAFETY_SETTINGS = {
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    }
+    SCHEMA_CONFIG = genai.types.GenerationConfig(temperature=0.7, max_output_tokens=2048)
+    STYLE_CONFIG = genai.types.GenerationConfig(temperature=0.8, max_output_tokens=1024)
+    CODE_CONFIG = genai.types.GenerationConfig(temperature=0.6, max_output_tokens=4096)
+    CHAT_CONFIG = genai.types.GenerationConfig(temperature=0.7, max_output_tokens=512)
+    QUALITY_CONFIG = genai.types.GenerationConfig(temperature=0.3, max_output_tokens=256)
+    PATCH_CONFIG = genai.types.GenerationConfig(temperature=0.6, max_output_tokens=1024)
+
     def __init__(self):
         self.api_key = os.getenv('GEMINI_API_KEY')
         if not self.api_key:
@@ -19,55 +300,83 @@ class GeminiClient:
         
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel('gemini-pro')
-        
-        # Configure safety settings
-        self.safety_settings = {
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-        }
-
-    async def generate_ui_schema(self, brief: str, mood: str = "futuristic") -> Dict[str, Any]:
-        """Generate UI schema from user brief using Gemini"""
-        prompt = f"""
-        You are a UI Design Architect. Convert this user brief into a framework-agnostic UI_SCHEMA.json.
-
-        User Brief: {brief}
-        Mood: {mood}
+        self._limiter = _RateLimiter(GEMINI_RPM)
 
-        Output a JSON "UI_SCHEMA.json" with:
-        - page_type: string
-        - title: string
-        - sections: array of sections with id, type, layout, components
-        - states: array of semantic states (loading, empty, error)
-        - accessibility_notes: array of accessibility requirements
+    async def _with_retry(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a Gemini request within the rate limit, retrying transient failures
 
-        Component types: heading, subheading, hero, navbar, sidebar, card, stat, chart, form, input, modal, button, list, grid
+        Backoff is exponential with full jitter so concurrent callers that hit
+        the quota together do not retry in lockstep.
+        """
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            await self._limiter.acquire()
+            try:
+                return await call()
+            except _TRANSIENT_ERRORS as e:
+                if attempt == GEMINI_MAX_RETRIES:
+                    raise
+                delay = random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+                logger.warning(f"Gemini request failed ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def count_tokens(self, text: str, accurate: bool = False) -> int:
+        """
+        Count the tokens in a prompt
 
-        Use a 12-column grid reference and responsive breakpoints (sm, md, lg).
+        Args:
+            text: Prompt text
+            accurate: Ask the countTokens API for the billed count instead of estimating
 
-        Output ONLY valid JSON, no markdown formatting or explanations.
+        Returns:
+            Token count
         """
+        if not accurate:
+            return approx_tokens(text)
+        response = await self._with_retry(lambda: asyncio.to_thread(self.model.count_tokens, text))
+        return response.total_tokens
+
+    @staticmethod
+    def _check_budget(prompt: str, generation_config: genai.types.GenerationConfig):
+        """Refuse prompts that cannot fit the context window before spending a request on them"""
+        needed = approx_tokens(prompt) + (generation_config.max_output_tokens or 0)
+        if needed > GEMINI_CONTEXT_TOKENS:
+            raise ValueError(f"Prompt needs ~{needed} tokens, over the {GEMINI_CONTEXT_TOKENS} token context window")
+
+    async def _generate_content(self, prompt: str, generation_config: genai.types.GenerationConfig):
+        """Run a Gemini generation without blocking the event loop"""
+        self._check_budget(prompt, generation_config)
+        return await self._with_retry(lambda: self.model.generate_content_async(
+            prompt,
+            safety_settings=self.SAFETY_SETTINGS,
+            generation_config=generation_config
+        ))
+
+    async def _stream_content(self, prompt: str, generation_config: genai.types.GenerationConfig) -> AsyncIterator[str]:
+        """Yield response text as Gemini generates it"""
+        self._check_budget(prompt, generation_config)
+        # Only opening the stream is retried; chunks already yielded cannot be taken back
+        response = await self._with_retry(lambda: self.model.generate_content_async(
+            prompt,
+            safety_settings=self.SAFETY_SETTINGS,
+            generation_config=generation_config,
+            stream=True
+        ))
+        async for chunk in response:
+            yield chunk.text
+
+    # Exact matches only: hashed n-gram vectors score briefs that differ in one
+    # meaningful word ("dark" vs "light" theme) above any usable threshold
+    @semantic_cache(namespace="UI_SCHEMA", version=PROMPT_VERSION, ttl=3600, shared=True)
+    async def generate_ui_schema(self, brief: str, mood: str = "futuristic") -> Dict[str, Any]:
+        """Generate UI schema from user brief using Gemini"""
+        prompt = UI_SCHEMA_TEMPLATE.substitute(brief=brief, mood=mood)
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                safety_settings=self.safety_settings,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=2048,
-                )
-            )
+            response = await self._generate_content(prompt, self.SCHEMA_CONFIG)
             
             # Extract JSON from response
-            content = response.text.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
-            
-            schema = json.loads(content)
+            schema = _extract_json(response.text)
             logger.info(f"Generated UI schema for brief: {brief[:50]}...")
             return schema
             
@@ -75,54 +384,15 @@ class GeminiClient:
             logger.error(f"Error generating UI schema: {e}")
             raise Exception(f"Failed to generate UI schema: {str(e)}")
 
+    @semantic_cache(namespace="STYLE_SPEC", version=PROMPT_VERSION, ttl=3600, shared=True)
     async def generate_style_spec(self, ui_schema: Dict[str, Any], style_name: str, design_memory: List[Dict] = None) -> Dict[str, Any]:
         """Generate style specification using Gemini"""
-        prompt = f"""
-        You are a Style Curator. Create a STYLE_SPEC.json based on the UI_SCHEMA.
-
-        UI Schema: {json.dumps(ui_schema, indent=2)}
-        Style Name: {style_name}
-        
-        Create a unique style specification with:
-        - style_name: string (e.g., "retro-futurism-mesh", "glass-aurora", "brutalist-editorial")
-        - novelty_score: float (0.0-1.0, aim for ≥0.8)
-        - trend_tags: array of trending design tags
-        - colors: object with bg, surface, text, primary, accent, muted (hex colors)
-        - typography: object with font_heading, font_body, scale
-        - radii: object with sm, md, lg (pixel values)
-        - spacing: object with unit, sectionY (pixel values)
-        - shadows: object with e1 (box-shadow value)
-        - effects: array of CSS effects (e.g., "aurora-bg:enabled", "glass-blur:10px")
-        - component_variants: object mapping component types to variant names
-        - a11y: object with min_contrast (e.g., "AA")
-
-        IMPORTANT:
-        - Avoid purple defaults unless explicitly requested
-        - Use cyan (#00d4ff) and neon green (#00ff88) as primary colors
-        - Ensure high contrast for accessibility
-        - Make it unique and trendy (glassmorphism, gradient mesh, brutalism, etc.)
-        - Add a one-line style description
-
-        Output ONLY valid JSON, no markdown formatting.
-        """
+        prompt = STYLE_SPEC_TEMPLATE.substitute(ui_schema=_compact(ui_schema), style_name=style_name)
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                safety_settings=self.safety_settings,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.8,
-                    max_output_tokens=1024,
-                )
-            )
+            response = await self._generate_content(prompt, self.STYLE_CONFIG)
             
-            content = response.text.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
-            
-            style_spec = json.loads(content)
+            style_spec = _extract_json(response.text)
             logger.info(f"Generated style spec: {style_name}")
             return style_spec
             
@@ -130,60 +400,31 @@ class GeminiClient:
             logger.error(f"Error generating style spec: {e}")
             raise Exception(f"Failed to generate style spec: {str(e)}")
 
-    async def generate_code(self, ui_schema: Dict[str, Any], style_spec: Dict[str, Any], variant_id: str) -> Dict[str, str]:
-        """Generate Next.js + Tailwind code using Gemini"""
-        prompt = f"""
-        You are a Frontend Engineer. Convert UI_SCHEMA + STYLE_SPEC to runnable Next.js + Tailwind code.
-
-        UI Schema: {json.dumps(ui_schema, indent=2)}
-        Style Spec: {json.dumps(style_spec, indent=2)}
-        Variant ID: {variant_id}
-
-        Generate:
-        1. A complete Next.js page component (page.tsx)
-        2. CSS variables file (tokens.css) with design tokens
-        3. Tailwind config extension (tailwind.config.js)
-        4. Component files for each component type
-
-        Requirements:
-        - Use design tokens as CSS variables
-        - Wire tokens into Tailwind config
-        - Generate modular components in /components
-        - Ensure accessibility (semantic HTML, ARIA attributes, keyboard navigation)
-        - Use the exact colors and styles from style_spec
-        - Make it responsive with the breakpoints from ui_schema
-        - Include proper TypeScript types
-
-        Output a JSON object with file paths as keys and file contents as values:
-        {{
-            "page.tsx": "...",
-            "tokens.css": "...",
-            "tailwind.config.js": "...",
-            "components/Button.tsx": "...",
-            "components/Card.tsx": "...",
-            // ... other component files
-        }}
-
-        Output ONLY valid JSON, no markdown formatting.
+    @semantic_cache(namespace="CODE", version=PROMPT_VERSION, ttl=3600, shared=True, exclude=("on_file",))
+    async def generate_code(
+        self,
+        ui_schema: Dict[str, Any],
+        style_spec: Dict[str, Any],
+        variant_id: str,
+        on_file: Optional[Callable[[str, str], Awaitable[None]]] = None
+    ) -> Dict[str, str]:
+        """Generate Next.js + Tailwind code using Gemini
+        
+        The response is streamed; on_file is awaited with each file's path and
+        content as soon as that file is complete. Cache hits skip the callback.
         """
+        prompt = CODE_TEMPLATE.substitute(ui_schema=_compact(ui_schema), style_spec=_compact(style_spec), variant_id=variant_id)
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                safety_settings=self.safety_settings,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.6,
-                    max_output_tokens=4096,
-                )
-            )
+            parser = _FileMapParser()
+            chunks = []
+            async for text in self._stream_content(prompt, self.CODE_CONFIG):
+                chunks.append(text)
+                if on_file is not None:
+                    for path, content in parser.feed(text):
+                        await on_file(path, content)
             
-            content = response.text.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
-            
-            code_files = json.loads(content)
+            code_files = _extract_json("".join(chunks))
             logger.info(f"Generated code for variant: {variant_id}")
             return code_files
             
@@ -193,32 +434,10 @@ class GeminiClient:
 
     async def generate_chat_response(self, message: str, context: Dict[str, Any] = None) -> str:
         """Generate chat response using Gemini"""
-        prompt = f"""
-        You are an AI assistant for Magic UI Elite, a premium UI generation platform. 
-        You help users create stunning user interfaces through AI orchestration.
-
-        User Message: {message}
-        Context: {json.dumps(context or {}, indent=2)}
-
-        Respond as a helpful, professional AI assistant. You can:
-        - Help with UI design decisions
-        - Explain design patterns and best practices
-        - Suggest improvements to generated designs
-        - Answer questions about the platform
-        - Provide creative inspiration
-
-        Keep responses concise, helpful, and professional. Use emojis sparingly.
-        """
+        prompt = CHAT_TEMPLATE.substitute(message=message, context=_compact(context or {}))
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                safety_settings=self.safety_settings,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=512,
-                )
-            )
+            response = await self._generate_content(prompt, self.CHAT_CONFIG)
             
             return response.text.strip()
             
@@ -228,90 +447,44 @@ class GeminiClient:
 
     async def analyze_design_quality(self, ui_schema: Dict[str, Any], style_spec: Dict[str, Any]) -> Dict[str, float]:
         """Analyze design quality using Gemini"""
-        prompt = f"""
-        You are a Design QA Engineer. Analyze the quality of this UI design.
-
-        UI Schema: {json.dumps(ui_schema, indent=2)}
-        Style Spec: {json.dumps(style_spec, indent=2)}
-
-        Rate each aspect from 0.0 to 1.0:
-        - accessibility_score: WCAG compliance, semantic HTML, keyboard navigation
-        - usability_score: user experience, navigation flow, information hierarchy
-        - visual_appeal: aesthetics, color harmony, typography, spacing
-        - responsiveness: mobile-first design, breakpoint handling
-        - performance: code efficiency, asset optimization
-        - innovation: uniqueness, trend alignment, creativity
-
-        Output ONLY a JSON object with these scores.
-        """
-
         try:
-            response = self.model.generate_content(
-                prompt,
-                safety_settings=self.safety_settings,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=256,
-                )
-            )
-            
-            content = response.text.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
-            
-            scores = json.loads(content)
-            logger.info(f"Analyzed design quality: {scores}")
-            return scores
-            
+            return await self._score_design_quality(ui_schema, style_spec)
         except Exception as e:
             logger.error(f"Error analyzing design quality: {e}")
-            return {
-                "accessibility_score": 0.8,
-                "usability_score": 0.8,
-                "visual_appeal": 0.8,
-                "responsiveness": 0.8,
-                "performance": 0.8,
-                "innovation": 0.8
-            }
-
-    async def generate_patch_suggestions(self, current_schema: Dict[str, Any], user_request: str) -> List[Dict[str, Any]]:
-        """Generate patch suggestions for UI modifications"""
-        prompt = f"""
-        You are a UI Refinement Expert. Suggest patches to modify the UI based on user request.
+            return dict(DEFAULT_QUALITY_SCORES)
 
-        Current UI Schema: {json.dumps(current_schema, indent=2)}
-        User Request: {user_request}
+    # Low temperature, so identical designs are scored from cache; failures raise and are never cached
+    @exact_match(namespace="DESIGN_QUALITY", version=PROMPT_VERSION, ttl=3600, shared=True)
+    async def _score_design_quality(self, ui_schema: Dict[str, Any], style_spec: Dict[str, Any]) -> Dict[str, float]:
+        prompt = DESIGN_QUALITY_TEMPLATE.substitute(ui_schema=_compact(ui_schema), style_spec=_compact(style_spec))
 
-        Generate JSON Patch operations to modify the schema:
-        - op: "add", "remove", "replace", "move", "copy", "test"
-        - path: JSON pointer to the element
-        - value: new value (for add/replace operations)
+        response = await self._generate_content(prompt, self.QUALITY_CONFIG)
+        
+        scores = _extract_json(response.text)
+        logger.info(f"Analyzed design quality: {scores}")
+        return scores
 
-        Output an array of patch operations that would fulfill the user's request.
-        """
+    async def generate_patch_suggestions(self, current_schema: Dict[str, Any], user_request: str) -> List[Dict[str, Any]]:
+        """Generate patch suggestions for UI modifications"""
+        prompt = PATCH_TEMPLATE.substitute(current_schema=_compact(current_schema), user_request=user_request)
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                safety_settings=self.safety_settings,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.6,
-                    max_output_tokens=1024,
-                )
-            )
+            response = await self._generate_content(prompt, self.PATCH_CONFIG)
             
-            content = response.text.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
+            patches = _extract_json(response.text)
+            if not isinstance(patches, list):
+                raise ValueError("expected a JSON array of patch operations")
             
-            patches = json.loads(content)
+            # Parse the operations and pointers once, then dry-run them so callers
+            # only ever receive patches that apply cleanly to the current schema
+            jsonpatch.JsonPatch(patches).apply(current_schema)
             logger.info(f"Generated {len(patches)} patch suggestions")
             return patches
             
+        except (jsonpatch.JsonPatchException, JsonPointerException) as e:
+            logger.warning(f"Discarding patch suggestions that do not apply: {e}")
+            return []
+            
         except Exception as e:
             logger.error(f"Error generating patch suggestions: {e}")
             return []
@@ -320,9 +493,17 @@ class GeminiClient:
         """Get API usage statistics"""
         return {
             "model": "gemini-pro",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "status": "active"
         }
 
-# Global instance
-gemini_client = GeminiClient()
+_gemini_client: Optional[GeminiClient] = None
+
+def get_gemini_client() -> GeminiClient:
+    """Get singleton Gemini client instance, created on first use"""
+    global _gemini_client
+    
+    if _gemini_client is None:
+        _gemini_client = GeminiClient()
+    
+    return _gemini_client
@@ -0,0 +1,279 @@
+"""
+LLM Response Cache
+Two-tier (exact-hash + semantic similarity) cache for expensive model calls
+"""
+
+import functools
+import hashlib
+import inspect
+import math
+import re
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import logging
+
+import orjson
+
+from . import redis_client
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_EMBEDDING_BUCKETS = 1 << 16
+
+
+def embed_text(text: str) -> Dict[int, float]:
+    """
+    Embed text as an L2-normalised sparse vector of hashed unigrams and bigrams
+
+    Args:
+        text: Free-form text such as a user brief
+
+    Returns:
+        Mapping of feature bucket to weight
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    vector: Dict[int, float] = {}
+    for feature in features:
+        bucket = int.from_bytes(
+            hashlib.blake2b(feature.encode(), digest_size=4).digest(), "little"
+        ) % _EMBEDDING_BUCKETS
+        vector[bucket] = vector.get(bucket, 0.0) + 1.0
+
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    if not norm:
+        return {}
+    return {bucket: weight / norm for bucket, weight in vector.items()}
+
+
+def cosine_similarity(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Cosine similarity of two normalised sparse vectors"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(bucket, 0.0) for bucket, weight in a.items())
+
+
+@dataclass(slots=True)
+class QuantizedVector:
+    """Sparse vector stored as packed bucket ids and int8 weights with one scale factor"""
+    buckets: array
+    weights: array
+    scale: float
+    
+    def dot(self, query: Dict[int, float]) -> float:
+        """Dot product with a full-precision sparse query vector"""
+        get = query.get
+        return self.scale * sum(weight * get(bucket, 0.0) for bucket, weight in zip(self.buckets, self.weights))
+
+
+def quantize_vector(vector: Dict[int, float]) -> QuantizedVector:
+    """
+    Quantize a sparse vector to int8 weights
+    
+    Args:
+        vector: Mapping of feature bucket to weight, as returned by embed_text
+        
+    Returns:
+        Quantized vector, a few bytes per feature instead of a dict entry
+    """
+    magnitudes = [abs(weight) for weight in vector.values()]
+    if not magnitudes:
+        return QuantizedVector(buckets=array("l"), weights=array("b"), scale=1.0)
+    
+    # embed_text weights are feature counts over one norm, so stepping by the smallest
+    # weight is exact; anything with a wider range falls back to a 127-level grid
+    peak, low = max(magnitudes), min(magnitudes)
+    scale = low if peak <= low * 127 else peak / 127
+    return QuantizedVector(
+        buckets=array("l", vector.keys()),
+        weights=array("b", (round(weight / scale) for weight in vector.values())),
+        scale=scale,
+    )
+
+
+def _digest(material: Any) -> str:
+    canonical = orjson.dumps(material, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return hashlib.sha256(canonical).hexdigest()
+
+
+@dataclass
+class _Entry:
+    expires_at: float
+    payload: bytes
+    scope: str
+    vector: Optional[QuantizedVector]
+
+
+class SemanticCache:
+    """
+    Bounded LRU cache with an exact-match tier and an embedding-similarity tier
+
+    Exact lookups hash the full call arguments. Semantic lookups only consider
+    entries whose non-text arguments (the "scope") are identical, so a near
+    duplicate brief with a different mood or style never matches.
+    """
+
+    def __init__(self, namespace: str, ttl: float = 3600, threshold: float = 0.92, max_entries: int = 512):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def get(self, key: str, scope: str, text: Optional[str] = None) -> Tuple[bool, Any]:
+        """
+        Look up a cached value
+
+        Args:
+            key: Exact-match key for the call
+            scope: Key of the call's non-text arguments
+            text: Free text to match semantically, if the call has one
+
+        Returns:
+            Tuple of (hit, value)
+        """
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self._entries.move_to_end(key)
+                return True, orjson.loads(entry.payload)
+            del self._entries[key]
+
+        if text is None:
+            return False, None
+
+        vector = embed_text(text)
+        best_key, best_score = None, self.threshold
+        for candidate_key, candidate in self._entries.items():
+            if candidate.scope != scope or candidate.vector is None or candidate.expires_at <= now:
+                continue
+            score = candidate.vector.dot(vector)
+            if score >= best_score:
+                best_key, best_score = candidate_key, score
+
+        if best_key is None:
+            return False, None
+
+        self._entries.move_to_end(best_key)
+        logger.info(f"Semantic cache hit in {self.namespace} (similarity {best_score:.3f})")
+        return True, orjson.loads(self._entries[best_key].payload)
+
+    def set(self, key: str, scope: str, value: Any, text: Optional[str] = None) -> bytes:
+        """
+        Store a value, evicting the least recently used entry when full
+
+        Returns:
+            The serialized value
+        """
+        payload = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        self.set_payload(key, scope, payload, text)
+        return payload
+
+    def set_payload(self, key: str, scope: str, payload: bytes, text: Optional[str] = None) -> None:
+        """Store an already serialized value"""
+        self._entries[key] = _Entry(
+            expires_at=time.monotonic() + self.ttl,
+            payload=payload,
+            scope=scope,
+            vector=quantize_vector(embed_text(text)) if text is not None else None,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_caches: Dict[str, SemanticCache] = {}
+
+
+def get_cache(namespace: str) -> Optional[SemanticCache]:
+    """Get the cache registered for a namespace, if any"""
+    return _caches.get(namespace)
+
+
+def semantic_cache(
+    namespace: str,
+    ttl: float = 3600,
+    threshold: float = 0.92,
+    text_arg: Optional[str] = None,
+    max_entries: int = 512,
+    shared: bool = False,
+    version: str = "",
+    exclude: Tuple[str, ...] = (),
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Cache the JSON result of an async LLM call
+
+    Callers may pass ``use_cache=False`` to bypass the cache for sensitive prompts.
+
+    Args:
+        namespace: Cache namespace, one per endpoint so results never collide
+        ttl: Entry lifetime in seconds
+        threshold: Minimum cosine similarity for a semantic hit
+        text_arg: Name of the free-text argument matched semantically; only safe where
+            the threshold has been calibrated against near-miss inputs, since n-gram
+            vectors cannot tell "dark theme" from "light theme" in a long brief
+        max_entries: Maximum number of cached entries
+        shared: Also keep exact-match results in Redis, for the same ttl, so every worker shares them
+        version: Prompt version; changing it invalidates earlier entries
+        exclude: Names of arguments that do not affect the result, such as callbacks
+
+    Returns:
+        Decorator for async functions and methods
+    """
+    cache = _caches.setdefault(namespace, SemanticCache(namespace, ttl, threshold, max_entries))
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, use_cache: bool = True, **kwargs):
+            if not use_cache:
+                return await func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {name: value for name, value in bound.arguments.items() if name != "self" and name not in exclude}
+
+            text = arguments.pop(text_arg, None) if text_arg else None
+            scope = _digest([namespace, version, arguments])
+            key = _digest([namespace, version, arguments, text])
+
+            hit, value = cache.get(key, scope, text)
+            if hit:
+                return value
+
+            if shared:
+                payload = await redis_client.get_llm_response(key)
+                if payload is not None:
+                    cache.set_payload(key, scope, payload, text)
+                    return orjson.loads(payload)
+
+            value = await func(*args, **kwargs)
+            payload = cache.set(key, scope, value, text)
+            if shared:
+                # The shared copy expires with the local one rather than at Redis's default
+                await redis_client.set_llm_response(key, payload, ttl=cache.ttl)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def exact_match(namespace: str, ttl: float = 3600, max_entries: int = 512, shared: bool = False, version: str = ""):
+    """
+    Cache the JSON result of an async LLM call on exact arguments only
+
+    For low-temperature calls, where a repeated prompt should give the same answer.
+    """
+    return semantic_cache(namespace, ttl=ttl, text_arg=None, max_entries=max_entries, shared=shared, version=version)
@@ -1,10 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, JSON
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, JSON, Index
 from datetime import datetime
 import json
 
-Base = declarative_base()
+from .database import Base
 
 class UISchema(Base):
     __tablename__ = "ui_schemas"
@@ -45,8 +43,12 @@ class ChatMessage(Base):
     role = Column(String(50), nullable=False)
     agent = Column(String(100))
     text = Column(Text, nullable=False)
-    metadata = Column(JSON)
+    # "metadata" is reserved on declarative classes; the column keeps its name
+    meta = Column("metadata", JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Backs keyset pagination of history, newest first
+    __table_args__ = (Index("ix_chat_messages_created_at_id", "created_at", "id"),)
 
 class Generation(Base):
     __tablename__ = "generations"
@@ -59,6 +61,8 @@ class Generation(Base):
     processing_time = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime)
+    
+    __table_args__ = (Index("ix_generations_status_created_at", "status", "created_at"),)
 
 class Agent(Base):
     __tablename__ = "agents"
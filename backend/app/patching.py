@@ -0,0 +1,36 @@
+"""
+Manifest Patching
+RFC 6902 JSON patches applied to a private copy of the preview manifest
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import jsonpatch
+import orjson
+
+def patch_manifest(
+    manifest: Dict[str, Any],
+    variant_id: str,
+    target: str,
+    patches: List[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Return a patched deep copy of the manifest and the copy's variant
+
+    The caller's manifest is never modified, however deeply the patches
+    reach. The variant is None when the manifest has no such variant, in
+    which case nothing is patched. Malformed patches raise
+    jsonpatch.JsonPatchException or jsonpointer.JsonPointerException.
+    """
+    # One orjson round-trip is a full deep copy, so in-place patching below stays private
+    manifest = orjson.loads(orjson.dumps(manifest))
+
+    variant = next((v for v in manifest.get("variants", []) if v["id"] == variant_id), None)
+    if variant is None:
+        return manifest, None
+
+    if target == "UI_SCHEMA":
+        manifest["ui_schema"] = jsonpatch.apply_patch(manifest.get("ui_schema", {}), patches, in_place=True)
+    elif target == "STYLE_SPEC":
+        variant["style_spec"] = jsonpatch.apply_patch(variant["style_spec"], patches, in_place=True)
+    return manifest, variant
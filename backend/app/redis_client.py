@@ -0,0 +1,193 @@
+"""
+Redis Client
+Shared cross-worker cache for the preview manifest and recent chat history
+"""
+
+import math
+import os
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional
+import logging
+
+import orjson
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+MANIFEST_KEY = "manifest:current"
+MANIFEST_TTL_SECONDS = 3600
+CHAT_KEY = "chat:recent"
+CHAT_TTL_SECONDS = 3600
+CHAT_MAX_MESSAGES = 200
+BROADCAST_CHANNEL = "ws:broadcast"
+TASK_KEY_PREFIX = "task:"
+TASK_TTL_SECONDS = 86400
+LLM_CACHE_KEY_PREFIX = "gemini:v1:"
+LLM_CACHE_TTL_SECONDS = 86400
+
+_redis: Optional[aioredis.Redis] = None
+
+
+async def init_redis() -> Optional[aioredis.Redis]:
+    """
+    Connect to Redis if REDIS_URL is configured
+
+    Returns:
+        Connected client, or None when Redis is not configured or unreachable
+    """
+    global _redis
+    if not REDIS_URL:
+        return None
+
+    client = aioredis.from_url(REDIS_URL, decode_responses=False, socket_timeout=1)
+    try:
+        await client.ping()
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis unavailable, using local storage only: {e}")
+        await client.aclose()
+        return None
+
+    _redis = client
+    return _redis
+
+
+def is_connected() -> bool:
+    return _redis is not None
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+async def get_manifest() -> Optional[bytes]:
+    """Get the serialized current manifest, or None on a miss or error"""
+    if _redis is None:
+        return None
+    try:
+        return await _redis.get(MANIFEST_KEY)
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis manifest read failed: {e}")
+        return None
+
+
+async def set_manifest(manifest: Dict[str, Any]) -> None:
+    if _redis is None:
+        return
+    try:
+        await _redis.set(MANIFEST_KEY, orjson.dumps(manifest), ex=MANIFEST_TTL_SECONDS)
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis manifest write failed: {e}")
+
+
+async def push_chat_messages(messages: List[Dict[str, Any]]) -> None:
+    """Prepend messages to the recent chat list, keeping it bounded"""
+    if _redis is None:
+        return
+    try:
+        async with _redis.pipeline(transaction=True) as pipe:
+            pipe.lpush(CHAT_KEY, *(orjson.dumps(message) for message in messages))
+            pipe.ltrim(CHAT_KEY, 0, CHAT_MAX_MESSAGES - 1)
+            pipe.expire(CHAT_KEY, CHAT_TTL_SECONDS)
+            await pipe.execute()
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis chat write failed: {e}")
+
+
+async def seed_chat_messages(messages: List[Dict[str, Any]]) -> None:
+    """Replace the recent chat list with messages given in chronological order"""
+    if _redis is None or not messages:
+        return
+    try:
+        async with _redis.pipeline(transaction=True) as pipe:
+            pipe.delete(CHAT_KEY)
+            # LPUSH leaves the last (newest) message at the head, as push_chat_messages does
+            pipe.lpush(CHAT_KEY, *(orjson.dumps(message) for message in messages))
+            pipe.ltrim(CHAT_KEY, 0, CHAT_MAX_MESSAGES - 1)
+            pipe.expire(CHAT_KEY, CHAT_TTL_SECONDS)
+            await pipe.execute()
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis chat seed failed: {e}")
+
+
+async def get_chat_messages(limit: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the most recent chat messages in chronological order
+
+    Args:
+        limit: Maximum number of messages
+
+    Returns:
+        Messages, or None on a miss or error so callers can fall back
+    """
+    if _redis is None or limit <= 0:
+        return None
+    try:
+        raw = await _redis.lrange(CHAT_KEY, 0, limit - 1)
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis chat read failed: {e}")
+        return None
+    if not raw:
+        return None
+    return [orjson.loads(item) for item in reversed(raw)]
+
+
+async def iter_broadcasts() -> AsyncIterator[bytes]:
+    """Yield WebSocket payloads published by background workers until cancelled"""
+    if _redis is None:
+        return
+    # A dedicated connection without the shared client's 1s socket timeout, which
+    # would end a blocking listen() after the first idle second
+    subscriber = aioredis.from_url(REDIS_URL, decode_responses=False, socket_timeout=None, health_check_interval=30)
+    pubsub = subscriber.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(BROADCAST_CHANNEL)
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                yield message["data"]
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis broadcast subscription ended: {e}")
+    finally:
+        await pubsub.aclose()
+        await subscriber.aclose()
+
+
+async def get_task_state(project_id: str) -> Optional[Dict[str, Any]]:
+    """Get a background generation's state, or None if unknown"""
+    if _redis is None:
+        return None
+    try:
+        raw = await _redis.hgetall(f"{TASK_KEY_PREFIX}{project_id}")
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis task state read failed: {e}")
+        return None
+    if not raw:
+        return None
+    return {name.decode(): orjson.loads(value) for name, value in raw.items()}
+
+
+async def get_llm_response(key: str) -> Optional[bytes]:
+    """Get a shared cached LLM response as serialized JSON, or None on a miss or error"""
+    if _redis is None:
+        return None
+    try:
+        raw = await _redis.get(f"{LLM_CACHE_KEY_PREFIX}{key}")
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis LLM cache read failed: {e}")
+        return None
+    return zlib.decompress(raw) if raw is not None else None
+
+
+async def set_llm_response(key: str, payload: bytes, ttl: float = LLM_CACHE_TTL_SECONDS) -> None:
+    """Share a serialized LLM response with every worker, compressed, for ttl seconds"""
+    if _redis is None:
+        return
+    try:
+        await _redis.set(f"{LLM_CACHE_KEY_PREFIX}{key}", zlib.compress(payload), ex=max(1, math.ceil(ttl)))
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis LLM cache write failed: {e}")
@@ -1,17 +1,27 @@
 from fastapi import Security, HTTPException, Depends
 from fastapi.security import APIKeyHeader
+import hmac
 import os
+import logging
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 API_KEY = os.getenv("API_KEY")
 API_KEY_NAME = "X-API-KEY"
 
+# Encoded once; compare_digest needs equal-type operands
+_API_KEY_BYTES = (API_KEY or "").encode()
+if not _API_KEY_BYTES:
+    logger.warning("API_KEY is not set; every API-key protected request will be rejected")
+
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=True)
 
 async def get_api_key(api_key: str = Security(api_key_header)):
-    if api_key == API_KEY:
+    # Constant-time comparison so response timing does not leak the key
+    if _API_KEY_BYTES and hmac.compare_digest(api_key.encode(), _API_KEY_BYTES):
         return api_key
     else:
         raise HTTPException(status_code=403, detail="Could not validate credentials")
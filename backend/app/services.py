@@ -1,7 +1,16 @@
+import asyncio
+import hashlib
+import html
 import os
+import shutil
+import string
 import uuid
-from typing import Dict, List, Any
-from datetime import datetime
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, List, Any, Optional
+from datetime import datetime, timezone
+
+import orjson
 
 class UIGenerationService:
     def __init__(self):
@@ -11,26 +20,127 @@ class UIGenerationService:
         return {"brief": brief, "mood": mood, "variants": []}
 
 class ChatService:
-    def __init__(self):
-        self.chat_history = []
+    def __init__(self, max_messages: int = 10_000):
+        # Bounded hot copy of recent chat; Redis and the database hold the durable history
+        self.chat_history: Deque[Dict[str, Any]] = deque(maxlen=max_messages)
     
     async def save_message(self, message: Dict[str, Any]) -> str:
-        message_id = str(uuid.uuid4())
-        message["id"] = message_id
-        message["timestamp"] = datetime.now()
+        # Keep an id and timestamp the caller already handed to clients
+        message.setdefault("id", str(uuid.uuid4()))
+        message.setdefault("timestamp", datetime.now(timezone.utc))
         self.chat_history.append(message)
-        return message_id
+        return message["id"]
     
     async def get_history(self, limit: int = 50) -> List[Dict[str, Any]]:
-        return self.chat_history[-limit:]
+        if limit <= 0:
+            return []
+        recent = list(islice(reversed(self.chat_history), limit))
+        recent.reverse()
+        return recent
+
+_PREVIEW_PAGE = string.Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>$title</title>
+<style>
+body { margin: 0; padding: 2rem; background: $bg; color: $text; font-family: system-ui, sans-serif; }
+h2 { color: $primary; font-size: 1rem; }
+pre { background: $surface; padding: 1rem; border-radius: 8px; overflow: auto; }
+</style>
+</head>
+<body>
+$files
+</body>
+</html>""")
+
+PREVIEW_STORE_MAX_ENTRIES = 500
 
 class PreviewService:
     def __init__(self):
         self.previews_dir = "previews"
-        os.makedirs(self.previews_dir, exist_ok=True)
+        # Rendered previews keyed by a hash of their inputs; variant paths link into it
+        self.store_dir = os.path.join(self.previews_dir, "_store")
+        os.makedirs(self.store_dir, exist_ok=True)
+        # At most one background sweep of the store at a time
+        self._prune_task: Optional[asyncio.Task] = None
     
     async def create_preview(self, variant_id: str, code_files: Dict[str, str], style_spec: Dict[str, Any]) -> str:
+        """Write a variant's preview, reusing the rendered copy when the code and style are unchanged"""
+        key = hashlib.blake2b(
+            orjson.dumps({"files": code_files, "style": style_spec}, option=orjson.OPT_SORT_KEYS),
+            digest_size=16
+        ).hexdigest()
+        rendered = await asyncio.to_thread(self._publish_preview, variant_id, key, code_files, style_spec)
+        if rendered and (self._prune_task is None or self._prune_task.done()):
+            # Sweep after the response rather than on the request path
+            self._prune_task = asyncio.create_task(asyncio.to_thread(self._prune_store))
         return f"/previews/{variant_id}/index.html"
     
+    def _publish_preview(self, variant_id: str, key: str, code_files: Dict[str, str], style_spec: Dict[str, Any]) -> bool:
+        """Link the variant to its stored preview; True if the preview had to be rendered"""
+        stored = os.path.join(self.store_dir, key)
+        rendered = not os.path.isdir(stored)
+        if rendered:
+            self._render_preview(stored, code_files, style_spec)
+        else:
+            os.utime(stored)
+        
+        # Swap the variant's link in one rename so readers never see a missing preview
+        link = os.path.join(self.previews_dir, variant_id)
+        tmp_link = f"{link}.{uuid.uuid4().hex}.tmp"
+        os.symlink(os.path.join("_store", key), tmp_link)
+        if os.path.isdir(link) and not os.path.islink(link):
+            shutil.rmtree(link)
+        os.replace(tmp_link, link)
+        return rendered
+    
+    @staticmethod
+    def _render_preview(stored: str, code_files: Dict[str, str], style_spec: Dict[str, Any]):
+        page = code_files.get("index.html")
+        if page is None:
+            colors = style_spec.get("colors") or {}
+            page = _PREVIEW_PAGE.substitute(
+                title=html.escape(str(style_spec.get("style_name", "Preview"))),
+                bg=html.escape(str(colors.get("bg", "#0a0a0a"))),
+                surface=html.escape(str(colors.get("surface", "#1a1a1a"))),
+                text=html.escape(str(colors.get("text", "#ffffff"))),
+                primary=html.escape(str(colors.get("primary", "#00d4ff"))),
+                files="\n".join(
+                    f"<h2>{html.escape(path)}</h2>\n<pre><code>{html.escape(str(content))}</code></pre>"
+                    for path, content in sorted(code_files.items())
+                )
+            )
+        
+        # Build in a scratch directory and rename it into place; concurrent renders of the same key are harmless
+        tmp_dir = f"{stored}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp_dir)
+        with open(os.path.join(tmp_dir, "index.html"), "w", encoding="utf-8") as f:
+            f.write(page)
+        try:
+            os.rename(tmp_dir, stored)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    def _prune_store(self):
+        """Drop the least recently used previews beyond PREVIEW_STORE_MAX_ENTRIES that no variant links to"""
+        with os.scandir(self.store_dir) as entries:
+            stored = [entry for entry in entries if entry.is_dir() and not entry.name.endswith(".tmp")]
+        if len(stored) <= PREVIEW_STORE_MAX_ENTRIES:
+            return
+        
+        # Variant links are what the manifest's preview paths resolve through; their targets stay
+        linked = set()
+        with os.scandir(self.previews_dir) as entries:
+            for entry in entries:
+                if entry.is_symlink():
+                    linked.add(os.path.basename(os.readlink(entry.path)))
+        excess = len(stored) - PREVIEW_STORE_MAX_ENTRIES
+        unlinked = [entry for entry in stored if entry.name not in linked]
+        unlinked.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in unlinked[:excess]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+    
     async def create_export(self, variants: List[Dict[str, Any]], format: str, include_assets: bool, optimize: bool) -> str:
         return f"{uuid.uuid4()}.zip"
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+Background Tasks
+Celery workers that run CrewAI generations outside the API process
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Optional
+import logging
+
+import orjson
+import redis
+from celery import Celery
+from celery.exceptions import WorkerShutdown
+from celery.signals import worker_init
+
+from .redis_client import BROADCAST_CHANNEL, REDIS_URL, TASK_KEY_PREFIX, TASK_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Task state and broadcasts go to REDIS_URL, the instance the API reads them from;
+# the broker may be a separate instance
+BROKER_URL = os.getenv("CELERY_BROKER_URL") or REDIS_URL or "redis://localhost:6379/0"
+
+celery_app = Celery("magicui", broker=BROKER_URL, backend=BROKER_URL)
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+)
+
+_redis: Optional[redis.Redis] = None
+_orchestrator = None
+
+# One event loop per worker process, so the pooled HTTP/2 connections to
+# Cerebras (bound to the loop that opened them) are reused across tasks
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+def _get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(REDIS_URL)
+    return _redis
+
+@worker_init.connect
+def _require_redis_url(**kwargs):
+    """Refuse to start a worker whose results the API could never see"""
+    if not REDIS_URL:
+        logger.critical("REDIS_URL is not set; the API reads crew task state and broadcasts from it")
+        raise WorkerShutdown("REDIS_URL is not set")
+
+
+class RedisBroadcaster:
+    """
+    Stand-in for WebSocketManager inside workers
+
+    Messages are published to Redis; the API process relays them to its WebSocket clients.
+    """
+
+    def has_clients(self) -> bool:
+        # Subscribers live in the API processes; always publish
+        return True
+
+    def publish(self, data: Dict[str, Any]):
+        self.publish_bytes(orjson.dumps(data))
+
+    def publish_bytes(self, payload: bytes):
+        try:
+            _get_redis().publish(BROADCAST_CHANNEL, payload)
+        except redis.RedisError as e:
+            logger.warning(f"Redis broadcast publish failed: {e}")
+
+    async def send_generation_progress(
+        self,
+        progress: float,
+        stage: str,
+        project_id: Optional[str] = None,
+        partial: Optional[str] = None
+    ):
+        self.publish({
+            "type": "generation_progress",
+            "data": {
+                "progress": progress,
+                "stage": stage,
+                "project_id": project_id,
+                "partial": partial
+            }
+        })
+
+
+def _set_task_state(project_id: str, **fields: Any):
+    """Record a generation's state in the task:{project_id} hash"""
+    key = f"{TASK_KEY_PREFIX}{project_id}"
+    pipe = _get_redis().pipeline()
+    pipe.hset(key, mapping={name: orjson.dumps(value) for name, value in fields.items()})
+    pipe.expire(key, TASK_TTL_SECONDS)
+    pipe.execute()
+
+
+def _get_orchestrator():
+    """One orchestrator per worker process, like the event loop, so its caches carry across tasks"""
+    global _orchestrator
+    if _orchestrator is None:
+        from .crewai_orchestrator import MagicUICrewOrchestrator
+
+        _orchestrator = MagicUICrewOrchestrator(
+            cerebras_api_key=os.getenv("CEREBRAS_API_KEY"),
+            websocket_manager=RedisBroadcaster()
+        )
+    return _orchestrator
+
+
+async def _orchestrate(design_intent: Dict[str, Any], project_id: str) -> Dict[str, Any]:
+    from .models import DesignIntentResponse
+
+    return await _get_orchestrator().orchestrate_ui_generation(
+        DesignIntentResponse.model_validate(design_intent),
+        project_id
+    )
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def run_crew_generation(self, design_intent: Dict[str, Any], project_id: str) -> Dict[str, Any]:
+    """Run a CrewAI generation, retrying transient failures"""
+    _set_task_state(project_id, status="running", attempt=self.request.retries + 1)
+    try:
+        result = _get_loop().run_until_complete(_orchestrate(design_intent, project_id))
+    except Exception as e:
+        logger.error(f"Crew generation {project_id} failed: {e}")
+        if self.request.retries >= self.max_retries:
+            _set_task_state(project_id, status="failed", error=str(e))
+            raise
+        _set_task_state(project_id, status="retrying", error=str(e))
+        raise self.retry(exc=e)
+
+    _set_task_state(project_id, status="completed", result=result)
+    return result
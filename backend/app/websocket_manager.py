@@ -1,68 +1,205 @@
-import json
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
 from fastapi import WebSocket
 import logging
 
+import msgspec
+import orjson
+
 logger = logging.getLogger(__name__)
 
+SEND_TIMEOUT_SECONDS = 5.0
+MAX_CONCURRENT_SENDS = 256
+# Frames buffered per client before it is checked for a stall; a burst of publishes
+# can pass this before any sender has run, so depth alone never disconnects
+CLIENT_QUEUE_SIZE = 256
+# A client this far behind with no send completed for this long is disconnected
+CLIENT_STALL_SECONDS = SEND_TIMEOUT_SECONDS
+# Memory bound per client, whatever its send rate
+CLIENT_QUEUE_HARD_LIMIT = 16 * CLIENT_QUEUE_SIZE
+
+# Caps in-flight socket writes across every client
+_send_slots = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+
+class ClientMessage(msgspec.Struct):
+    """Inbound WebSocket frame sent by the frontend"""
+    type: str
+    data: Any = None
+    timestamp: Optional[str] = None
+
+_decoder = msgspec.json.Decoder(ClientMessage)
+_encoder = msgspec.json.Encoder()
+
 class WebSocketManager:
-    """Manages WebSocket connections for real-time updates"""
+    """Manages WebSocket connections for real-time updates
+    
+    Each client gets a bounded outbound queue drained by its own sender task, so
+    producers only enqueue and a slow socket never holds up anyone else.
+    """
     
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        self._queues: Dict[WebSocket, "asyncio.Queue[str]"] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
+        # When each client last completed a send or was fully caught up
+        self._last_progress: Dict[WebSocket, float] = {}
+        # The loop only keeps weak references to tasks; hold close tasks until they finish
+        self._closing: Set[asyncio.Task] = set()
     
     async def connect(self, websocket: WebSocket):
         """Accept a new WebSocket connection"""
         await websocket.accept()
+        queue: "asyncio.Queue[str]" = asyncio.Queue()
         self.active_connections.append(websocket)
+        self._queues[websocket] = queue
+        self._last_progress[websocket] = asyncio.get_running_loop().time()
+        self._senders[websocket] = asyncio.create_task(self._drain(websocket, queue))
         logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection"""
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+        self._queues.pop(websocket, None)
+        self._last_progress.pop(websocket, None)
+        sender = self._senders.pop(websocket, None)
+        if sender is not None and sender is not asyncio.current_task():
+            sender.cancel()
         logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
     
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        """Send a message to a specific WebSocket connection"""
+    async def _drain(self, websocket: WebSocket, queue: "asyncio.Queue[str]"):
+        """Write a client's queued frames in order until it disconnects"""
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await queue.get()
+            if not await self._safe_send(websocket, message):
+                self.disconnect(websocket)
+                return
+            self._last_progress[websocket] = loop.time()
+    
+    @staticmethod
+    async def _safe_send(connection: WebSocket, message: str) -> bool:
+        """Send one text frame, reporting failure or a stalled client instead of raising"""
         try:
-            await websocket.send_text(message)
+            async with _send_slots:
+                await asyncio.wait_for(connection.send_text(message), timeout=SEND_TIMEOUT_SECONDS)
+            return True
         except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+            logger.error(f"Error sending to connection: {e!r}")
+            return False
+    
+    def _enqueue(self, websocket: WebSocket, message: str) -> bool:
+        queue = self._queues.get(websocket)
+        if queue is None:
+            return False
+        
+        now = asyncio.get_running_loop().time()
+        backlog = queue.qsize()
+        if backlog == 0:
+            # Caught up; any wait from here on is measured from now
+            self._last_progress[websocket] = now
+        elif backlog >= CLIENT_QUEUE_SIZE:
+            stalled = now - self._last_progress.get(websocket, now) > CLIENT_STALL_SECONDS
+            if stalled or backlog >= CLIENT_QUEUE_HARD_LIMIT:
+                self._drop_slow_client(websocket)
+                return False
+        queue.put_nowait(message)
+        return True
+    
+    def _drop_slow_client(self, websocket: WebSocket):
+        logger.warning("WebSocket client fell too far behind; disconnecting")
+        self.disconnect(websocket)
+        # 1013 (try again later) prompts the frontend to reconnect and resync
+        close = asyncio.create_task(self._close(websocket, code=1013))
+        self._closing.add(close)
+        close.add_done_callback(self._closing.discard)
+    
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+    
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        """Send a message to a specific WebSocket connection"""
+        self._enqueue(websocket, message)
     
     async def broadcast(self, data: Dict[str, Any]):
         """Broadcast a message to all connected WebSockets"""
+        self.publish(data)
+    
+    async def broadcast_bytes(self, payload: bytes):
+        """Broadcast an already-serialized JSON message to all connected WebSockets"""
+        self.publish_bytes(payload)
+    
+    def has_clients(self) -> bool:
+        """Whether any WebSocket is connected to receive broadcasts"""
+        return bool(self.active_connections)
+    
+    def publish(self, data: Dict[str, Any]):
+        """Queue a message for every client without waiting on the sockets"""
         if not self.active_connections:
             return
         
-        message = json.dumps(data)
-        disconnected = []
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to connection: {e}")
-                disconnected.append(connection)
+        self.publish_bytes(orjson.dumps(data))
+    
+    def publish_bytes(self, payload: bytes):
+        """Queue an already-serialized JSON message for every client without waiting on the sockets"""
+        if not self.active_connections:
+            return
         
-        # Remove disconnected connections
-        for connection in disconnected:
-            self.disconnect(connection)
+        # Decoded once and sent as text frames, which is what the frontend parses
+        message = payload.decode()
+        for connection in list(self.active_connections):
+            self._enqueue(connection, message)
+    
+    async def stop(self):
+        """Stop every client's sender, dropping anything still queued"""
+        senders = list(self._senders.values())
+        self._senders.clear()
+        for sender in senders:
+            sender.cancel()
+        await asyncio.gather(*senders, *self._closing, return_exceptions=True)
+    
+    async def send_generation_progress(
+        self,
+        progress: float,
+        stage: str,
+        project_id: Optional[str] = None,
+        partial: Optional[str] = None
+    ):
+        """Broadcast overall generation progress"""
+        self.publish({
+            "type": "generation_progress",
+            "data": {
+                "progress": progress,
+                "stage": stage,
+                "project_id": project_id,
+                "partial": partial
+            }
+        })
     
-    async def handle_message(self, websocket: WebSocket, message: Dict[str, Any]):
-        """Handle incoming WebSocket message"""
+    async def handle_message(self, websocket: WebSocket, data: str):
+        """Decode, validate and handle an incoming WebSocket frame"""
+        try:
+            message = _decoder.decode(data)
+        except msgspec.DecodeError as e:
+            logger.warning(f"Invalid WebSocket message: {e}")
+            await self.send_personal_message(
+                _encoder.encode({"type": "error", "data": {"message": f"Invalid message: {e}"}}).decode(),
+                websocket
+            )
+            return
+        
         try:
-            message_type = message.get("type")
-            
-            if message_type == "ping":
-                await self.send_personal_message(json.dumps({"type": "pong"}), websocket)
-            elif message_type == "subscribe":
+            if message.type == "ping":
+                await self.send_personal_message(_encoder.encode({"type": "pong"}).decode(), websocket)
+            elif message.type == "subscribe":
                 # Handle subscription to specific updates
                 pass
             else:
-                logger.warning(f"Unknown message type: {message_type}")
+                logger.warning(f"Unknown message type: {message.type}")
                 
         except Exception as e:
             logger.error(f"Error handling WebSocket message: {e}")
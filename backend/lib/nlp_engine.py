@@ -13,6 +13,21 @@ from app.models import DesignIntentResponse
 
 logger = logging.getLogger(__name__)
 
+# Validated once; callers get a deep copy so the shared lists stay untouched
+_DEFAULT_ANALYSIS = DesignIntentResponse(
+    page_type="landing",
+    style_preferences=["modern"],
+    components=["header", "hero", "features", "footer"],
+    layout="single_column",
+    complexity=0.5,
+    business_domain="general",
+    target_audience="general",
+    brand_personality=["friendly", "approachable"],
+    functional_requirements=["responsive"],
+    technical_requirements=["react_nextjs", "tailwind"],
+    confidence=0.3
+)
+
 class AdvancedNLPEngine:
     def __init__(self):
         self.design_patterns = self._initialize_design_patterns()
@@ -427,16 +442,4 @@ class AdvancedNLPEngine:
     
     def _get_default_analysis(self) -> DesignIntentResponse:
         """Return default analysis when processing fails"""
-        return DesignIntentResponse(
-            page_type="landing",
-            style_preferences=["modern"],
-            components=["header", "hero", "features", "footer"],
-            layout="single_column",
-            complexity=0.5,
-            business_domain="general",
-            target_audience="general",
-            brand_personality=["friendly", "approachable"],
-            functional_requirements=["responsive"],
-            technical_requirements=["react_nextjs", "tailwind"],
-            confidence=0.3
-        )
\ No newline at end of file
+        return _DEFAULT_ANALYSIS.model_copy(deep=True)
\ No newline at end of file
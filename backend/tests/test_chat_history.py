@@ -0,0 +1,95 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app import crud, models
+from app.database import Base
+
+PARSE_TIMESTAMP = TypeAdapter(datetime)
+
+
+def as_response(message):
+    # What a client receives: FastAPI's JSON encoding of the message
+    return json.loads(json.dumps(jsonable_encoder(message)))
+
+
+def cursor(response_message):
+    # Parsed the way FastAPI parses the before_timestamp query parameter
+    return PARSE_TIMESTAMP.validate_python(response_message["timestamp"]), response_message["id"]
+
+
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        yield db
+    await engine.dispose()
+
+
+def chat_messages(count):
+    # Built like /api/chat builds them; pairs share a timestamp so the id breaks ties
+    start = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "role": "user" if i % 2 == 0 else "agent",
+            "agent": None,
+            "text": f"message {i}",
+            "timestamp": start + timedelta(milliseconds=i // 2),
+            "metadata": {}
+        }
+        for i in range(count)
+    ]
+
+
+def newest_first(messages):
+    return sorted(messages, key=lambda m: (m["timestamp"], m["id"]), reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_cursor_from_chat_response_pages_back_from_that_message(session):
+    messages = chat_messages(6)
+    await crud.create_chat_messages(session, messages)
+    newest = newest_first(messages)
+
+    rows = await crud.get_chat_messages(session, before=cursor(as_response(newest[0])), limit=10)
+
+    assert [row.id for row in rows] == [m["id"] for m in newest[1:]]
+
+
+@pytest.mark.asyncio
+async def test_history_pages_cover_every_message_once(session):
+    messages = chat_messages(11)
+    await crud.create_chat_messages(session, messages)
+
+    seen = []
+    before = None
+    while True:
+        rows = await crud.get_chat_messages(session, before=before, limit=3)
+        if not rows:
+            break
+        # The endpoint returns each page oldest first; the client pages from its first message
+        page = [as_response(crud.chat_message_to_dict(row)) for row in reversed(rows)]
+        seen.extend(message["id"] for message in reversed(page))
+        before = cursor(page[0])
+
+    assert seen == [m["id"] for m in newest_first(messages)]
+
+
+@pytest.mark.asyncio
+async def test_stored_message_matches_what_the_client_was_sent(session):
+    message = chat_messages(1)[0]
+    await crud.create_chat_messages(session, [message])
+
+    (row,) = await crud.get_chat_messages(session, limit=1)
+
+    assert as_response(crud.chat_message_to_dict(row)) == as_response(message)
@@ -0,0 +1,74 @@
+import pytest
+
+from app import redis_client
+from app.llm_cache import cosine_similarity, embed_text, semantic_cache
+
+DARK_BRIEF = (
+    "A pricing page for a B2B analytics SaaS with three tiers, a monthly and annual "
+    "toggle, a feature comparison table, customer logos, an FAQ accordion and a "
+    "dark theme with a bold call to action in the hero section"
+)
+LIGHT_BRIEF = DARK_BRIEF.replace("dark theme", "light theme")
+TWO_TIER_BRIEF = LIGHT_BRIEF.replace("three tiers", "two tiers")
+
+
+def test_near_miss_briefs_look_alike_to_ngram_embeddings():
+    # Why the exact tier is the only safe one until a real embedding model is wired in
+    assert cosine_similarity(embed_text(DARK_BRIEF), embed_text(LIGHT_BRIEF)) > 0.92
+    assert cosine_similarity(embed_text(DARK_BRIEF), embed_text(TWO_TIER_BRIEF)) > 0.92
+
+
+@pytest.mark.asyncio
+async def test_exact_cache_does_not_serve_near_miss_briefs():
+    calls = []
+
+    @semantic_cache(namespace="TEST_NEAR_MISS")
+    async def generate(brief: str, mood: str = "futuristic"):
+        calls.append(brief)
+        return {"brief": brief}
+
+    assert await generate(DARK_BRIEF) == {"brief": DARK_BRIEF}
+    assert await generate(LIGHT_BRIEF) == {"brief": LIGHT_BRIEF}
+    assert await generate(TWO_TIER_BRIEF) == {"brief": TWO_TIER_BRIEF}
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_exact_cache_reuses_identical_calls():
+    calls = []
+
+    @semantic_cache(namespace="TEST_IDENTICAL")
+    async def generate(brief: str, mood: str = "futuristic"):
+        calls.append(brief)
+        return {"brief": brief}
+
+    await generate(DARK_BRIEF)
+    assert await generate(DARK_BRIEF, mood="futuristic") == {"brief": DARK_BRIEF}
+    assert await generate(DARK_BRIEF, mood="calm") == {"brief": DARK_BRIEF}
+    assert len(calls) == 2
+    assert await generate(DARK_BRIEF, use_cache=False) == {"brief": DARK_BRIEF}
+    assert len(calls) == 3
+
+
+class RecordingRedis:
+    def __init__(self):
+        self.expiries = {}
+
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value, ex=None):
+        self.expiries[key] = ex
+
+
+@pytest.mark.asyncio
+async def test_shared_tier_expires_with_the_decorator_ttl(monkeypatch):
+    fake = RecordingRedis()
+    monkeypatch.setattr(redis_client, "_redis", fake)
+
+    @semantic_cache(namespace="TEST_SHARED_TTL", ttl=600, shared=True)
+    async def generate(brief: str):
+        return {"brief": brief}
+
+    await generate(DARK_BRIEF)
+    assert list(fake.expiries.values()) == [600]
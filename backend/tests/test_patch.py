@@ -0,0 +1,63 @@
+import jsonpatch
+import pytest
+from jsonpointer import JsonPointerException
+
+from app.patching import patch_manifest
+
+
+def make_manifest():
+    return {
+        "brief": "A landing page",
+        "ui_schema": {
+            "sections": [
+                {"type": "hero", "props": {"title": "Hello", "cta": {"label": "Start"}}}
+            ]
+        },
+        "variants": [
+            {"id": "v1", "style_spec": {"colors": {"primary": "#000000"}, "font": "Inter"}}
+        ]
+    }
+
+
+def test_nested_ui_schema_replace_does_not_alias_caller_manifest():
+    original = make_manifest()
+    patches = [{"op": "replace", "path": "/sections/0/props/cta/label", "value": "Go"}]
+
+    patched, variant = patch_manifest(original, "v1", "UI_SCHEMA", patches)
+
+    assert patched["ui_schema"]["sections"][0]["props"]["cta"]["label"] == "Go"
+    assert original == make_manifest()
+    assert patched["ui_schema"]["sections"][0]["props"] is not original["ui_schema"]["sections"][0]["props"]
+    assert variant is patched["variants"][0]
+
+
+def test_nested_style_spec_replace_does_not_alias_caller_manifest():
+    original = make_manifest()
+    patches = [{"op": "replace", "path": "/colors/primary", "value": "#ffffff"}]
+
+    patched, variant = patch_manifest(original, "v1", "STYLE_SPEC", patches)
+
+    assert variant["style_spec"]["colors"]["primary"] == "#ffffff"
+    assert original == make_manifest()
+
+
+def test_unknown_variant_patches_nothing():
+    original = make_manifest()
+    patches = [{"op": "replace", "path": "/sections/0/props/title", "value": "Bye"}]
+
+    patched, variant = patch_manifest(original, "missing", "UI_SCHEMA", patches)
+
+    assert variant is None
+    assert patched == make_manifest()
+
+
+def test_malformed_patch_raises_and_leaves_caller_manifest_alone():
+    original = make_manifest()
+    patches = [
+        {"op": "replace", "path": "/sections/0/props/title", "value": "Bye"},
+        {"op": "replace", "path": "/sections/5/props/title", "value": "Nope"}
+    ]
+
+    with pytest.raises((jsonpatch.JsonPatchException, JsonPointerException)):
+        patch_manifest(original, "v1", "UI_SCHEMA", patches)
+    assert original == make_manifest()
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app import websocket_manager
+from app.websocket_manager import WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.close_code = None
+        self._unblocked = asyncio.Event()
+        if not blocked:
+            self._unblocked.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        await self._unblocked.wait()
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+async def settle():
+    for _ in range(50):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_burst_of_publishes_reaches_a_healthy_client():
+    manager = WebSocketManager()
+    client = FakeWebSocket()
+    await manager.connect(client)
+
+    # Far more than CLIENT_QUEUE_SIZE frames before any sender task gets to run
+    for i in range(2 * websocket_manager.CLIENT_QUEUE_SIZE):
+        manager.publish({"type": "generation_progress", "data": {"progress": i}})
+    while len(client.sent) < 2 * websocket_manager.CLIENT_QUEUE_SIZE:
+        await settle()
+
+    assert client.close_code is None
+    assert manager.get_connection_count() == 1
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_stalled_client_is_disconnected_with_1013(monkeypatch):
+    monkeypatch.setattr(websocket_manager, "CLIENT_QUEUE_SIZE", 4)
+    monkeypatch.setattr(websocket_manager, "CLIENT_STALL_SECONDS", 0.05)
+    manager = WebSocketManager()
+    healthy = FakeWebSocket()
+    stalled = FakeWebSocket(blocked=True)
+    await manager.connect(healthy)
+    await manager.connect(stalled)
+
+    for i in range(6):
+        manager.publish({"type": "chat_message", "data": {"n": i}})
+    await asyncio.sleep(0.1)
+    manager.publish({"type": "chat_message", "data": {"n": 6}})
+    await settle()
+
+    assert stalled.close_code == 1013
+    assert healthy.close_code is None
+    assert len(healthy.sent) == 7
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_hard_limit_bounds_a_client_that_never_gets_to_send(monkeypatch):
+    monkeypatch.setattr(websocket_manager, "CLIENT_QUEUE_SIZE", 4)
+    monkeypatch.setattr(websocket_manager, "CLIENT_QUEUE_HARD_LIMIT", 8)
+    manager = WebSocketManager()
+    client = FakeWebSocket(blocked=True)
+    await manager.connect(client)
+
+    for i in range(9):
+        manager.publish({"type": "generation_progress", "data": {"progress": i}})
+    await settle()
+
+    assert client.close_code == 1013
+    assert manager.get_connection_count() == 0
+    await manager.stop()